@@ -0,0 +1,114 @@
+"""Annual aberration of starlight for whole star lists, over arrays of times.
+
+Each star's direction is combined with the Earth's orbital velocity (from
+ephemeris.earth_velocity) by the special-relativistic aberration formula,
+for N stars at M times in one broadcast. Displacements are returned in the
+star's tangent plane, east and north, so stars at the poles need no special
+treatment.
+
+Over a year each star traces an ellipse with semi-major axis equal to the
+constant of aberration, parallel to the ecliptic, and semi-minor axis
+shrunk by the sine of the star's ecliptic latitude; ellipses() returns
+those parameters directly.
+"""
+
+from typing import NamedTuple
+
+import ephemeris
+import numpy as np
+
+# Arcseconds per radian
+ARCSEC = np.degrees(1) * 3600
+
+
+class Ellipses(NamedTuple):
+    """Annual aberration ellipse of each star, as arrays.
+
+    Axes are in arcseconds; the position angle of the major axis is in
+    degrees, from north through east, in the requested frame.
+    """
+
+    semi_major: np.ndarray
+    semi_minor: np.ndarray
+    position_angle: np.ndarray
+
+
+def tangent_basis(longitude, latitude):
+    """Return unit vectors towards each star, and east and north along the sky there.
+
+    Args:
+        longitude, latitude: right ascension and declination, or ecliptic
+            longitude and latitude, in degrees
+
+    Returns:
+        tuple of (direction, east, north) arrays of shape (..., 3)
+    """
+    lon, lat = np.broadcast_arrays(np.radians(longitude), np.radians(latitude))
+    direction = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon),
+                          np.sin(lat)], axis=-1)
+    east = np.stack([-np.sin(lon), np.cos(lon), np.zeros_like(lon)], axis=-1)
+    north = np.stack([-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon),
+                      np.cos(lat)], axis=-1)
+    return direction, east, north
+
+
+def aberrate(direction, velocity):
+    """Apparent direction of a source seen by an observer moving at velocity (in units of c).
+
+    Both arguments broadcast, with vectors on the last axis.
+    """
+    v2 = np.sum(velocity ** 2, axis=-1, keepdims=True)
+    inverse_gamma = np.sqrt(1 - v2)
+    dot = np.sum(direction * velocity, axis=-1, keepdims=True)
+    apparent = inverse_gamma * direction + velocity * (1 + dot / (1 + inverse_gamma))
+    return apparent / np.linalg.norm(apparent, axis=-1, keepdims=True)
+
+
+def displacements(longitude, latitude, times, frame='equatorial'):
+    """Aberrational displacement of N stars at M times.
+
+    Args:
+        longitude, latitude: star positions in degrees, shape (N,), in frame
+        times: datetime64 values or Julian dates, shape (M,)
+        frame: 'equatorial' (RA and Dec) or 'ecliptic', both of date
+
+    Returns:
+        tuple of (east, north) displacements in arcseconds, shape (N, M);
+        east is the change in longitude times the cosine of the latitude
+    """
+    direction, east, north = (vector[:, np.newaxis] for vector in
+                              tangent_basis(np.atleast_1d(longitude), np.atleast_1d(latitude)))
+    velocity = ephemeris.earth_velocity(np.atleast_1d(times), frame)[np.newaxis]
+    shift = aberrate(direction, velocity) - direction
+    return np.sum(shift * east, axis=-1) * ARCSEC, np.sum(shift * north, axis=-1) * ARCSEC
+
+
+def ellipses(longitude, latitude, frame='equatorial', epoch=ephemeris.J2000):
+    """Annual aberration ellipse of each star.
+
+    Args:
+        longitude, latitude: star positions in degrees, in frame
+        frame: 'equatorial' or 'ecliptic'
+        epoch: Julian date fixing the obliquity for the equatorial frame
+
+    Returns:
+        Ellipses, each field shaped like the broadcast star positions
+    """
+    direction, east, north = tangent_basis(longitude, latitude)
+    if frame == 'ecliptic':
+        pole = np.array([0.0, 0.0, 1.0])
+    elif frame == 'equatorial':
+        obliquity = np.radians(ephemeris.mean_obliquity(epoch))
+        pole = np.array([0.0, -np.sin(obliquity), np.cos(obliquity)])
+    else:
+        raise ValueError(f"unknown frame {frame!r}; expected 'equatorial' or 'ecliptic'")
+
+    sin_latitude = direction @ pole
+    # The major axis runs along the ecliptic, perpendicular to the ecliptic pole
+    along = np.cross(pole, direction)
+    position_angle = np.degrees(np.arctan2(np.sum(along * east, axis=-1),
+                                           np.sum(along * north, axis=-1))) % 180
+    kappa = ephemeris.ABERRATION_CONSTANT
+    return Ellipses(semi_major=np.full_like(sin_latitude, kappa),
+                    semi_minor=kappa * np.abs(sin_latitude),
+                    position_angle=position_angle)
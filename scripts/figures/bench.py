@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""Benchmark every registered figure and track the results over time.
+
+Each figure is drawn and encoded to PNG in memory (nothing under
+src/figures is touched) in a fresh worker process, recording:
+
+    wall_s          wall-clock time to draw and encode the figure
+    cpu_s           CPU time, including TeX subprocesses
+    peak_rss_bytes  peak resident set size of the worker process
+    artists         visible artists in the drawn figure
+    output_bytes    size of the encoded PNG
+
+Each figure is measured three times by default and the best value of each
+metric kept; the spread of the timings between repeats is recorded too.
+Every run is appended to a JSON history file. The baseline is the median of
+each metric over the last five runs of the same profile on the same host, and
+any metric that grew by more than the threshold against it is flagged as a
+regression, in which case the exit status is 1. Timings must also grow by
+more than a fixed floor and by more than three times the spread between
+repeats, so scheduler noise on a busy machine is not reported.
+
+Examples:
+    bench.py                                  # every figure, best of three
+    bench.py --only 'ch14-*' --repeat 5       # best of five runs per figure
+    bench.py --threshold 0.1                  # flag growth above 10%
+    bench.py --window 10                      # median of the last ten runs
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import common
+import matplotlib.pyplot as plt
+import render
+
+HISTORY_PATH = common.PROJECT_ROOT / "build" / "bench" / "figures.json"
+
+# Metrics compared against the baseline; timings also need an absolute change
+# above the larger of the noise floor and SPREAD_FACTOR times the spread
+# between repeats (recorded under SPREAD) before they count as a regression
+METRICS = ('wall_s', 'cpu_s', 'peak_rss_bytes', 'artists', 'output_bytes')
+NOISE_FLOOR = {'wall_s': 0.2, 'cpu_s': 0.2}
+SPREAD = {'wall_s': 'wall_spread_s', 'cpu_s': 'cpu_spread_s'}
+SPREAD_FACTOR = 3
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def measure(figure_id: str) -> dict:
+    """Draw and encode one registered figure, returning its metrics."""
+    spec = common.FIGURES[figure_id]
+    before = os.times()
+    start = time.perf_counter()
+    fig = spec.func()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', **common.SAVE_KWARGS)
+    wall = time.perf_counter() - start
+    after = os.times()
+    artists = sum(1 for artist in fig.findobj() if artist.get_visible())
+    plt.close(fig)
+    cpu = sum(getattr(after, field) - getattr(before, field)
+              for field in ('user', 'system', 'children_user', 'children_system'))
+    return {
+        'wall_s': round(wall, 4),
+        'cpu_s': round(cpu, 4),
+        'peak_rss_bytes': _peak_rss_bytes(),
+        'artists': artists,
+        'output_bytes': buffer.getbuffer().nbytes,
+    }
+
+
+def run_benchmarks(figure_ids, repeat: int) -> dict:
+    """Measure each figure in its own process, keeping the best of each metric.
+
+    The spread (largest minus smallest) of each timing across the repeats is
+    kept alongside, under the names in SPREAD.
+    """
+    results = {}
+    # One task per process, so peak RSS belongs to a single figure
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1,
+                             initializer=render.load_chapters) as pool:
+        for figure_id in figure_ids:
+            runs = [pool.submit(measure, figure_id).result() for _ in range(repeat)]
+            results[figure_id] = {metric: min(run[metric] for run in runs) for metric in METRICS}
+            for metric, spread in SPREAD.items():
+                values = [run[metric] for run in runs]
+                results[figure_id][spread] = round(max(values) - min(values), 4)
+            print(_format_row(figure_id, results[figure_id]))
+    return results
+
+
+def _format_row(figure_id: str, metrics: dict) -> str:
+    return (f"{figure_id:40s} {metrics['wall_s']:8.3f}s {metrics['cpu_s']:8.3f}s "
+            f"{metrics['peak_rss_bytes'] / 2**20:8.1f} MiB {metrics['artists']:7d} "
+            f"{metrics['output_bytes'] / 1024:9.1f} KiB")
+
+
+def baseline_results(runs) -> dict:
+    """Return the median of each figure's metrics over several runs.
+
+    A figure missing from some runs gets the median of the runs it is in.
+    """
+    values = {}
+    for run in runs:
+        for figure_id, metrics in run['results'].items():
+            for metric, value in metrics.items():
+                values.setdefault(figure_id, {}).setdefault(metric, []).append(value)
+    return {figure_id: {metric: statistics.median(samples) for metric, samples in metrics.items()}
+            for figure_id, metrics in values.items()}
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list:
+    """Compare results with a baseline from baseline_results().
+
+    Returns:
+        list of (figure id, metric, baseline value, new value)
+    """
+    regressions = []
+    for figure_id, metrics in results.items():
+        previous = baseline.get(figure_id)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            old, new = previous.get(metric), metrics[metric]
+            if old is None or new <= old * (1 + threshold):
+                continue
+            noise = NOISE_FLOOR.get(metric, 0)
+            if metric in SPREAD:
+                spread = max(metrics[SPREAD[metric]], previous.get(SPREAD[metric], 0))
+                noise = max(noise, SPREAD_FACTOR * spread)
+            if new - old <= noise:
+                continue
+            regressions.append((figure_id, metric, old, new))
+    return regressions
+
+
+def load_history(path) -> list:
+    """Load the list of previous runs, oldest first."""
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return []
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=common.PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--only', action='append', metavar='PATTERN',
+                        help='benchmark only figures whose id matches this glob (repeatable)')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='runs per figure; the best value of each metric is kept (default: 3)')
+    parser.add_argument('-t', '--threshold', type=float, default=0.15,
+                        help='relative growth flagged as a regression (default: 0.15)')
+    parser.add_argument('-w', '--window', type=int, default=5,
+                        help='previous runs of the same profile and host whose median is '
+                             'the baseline (default: 5)')
+    parser.add_argument('--history', type=Path, default=HISTORY_PATH,
+                        help=f'JSON history file (default: {os.path.relpath(HISTORY_PATH)})')
+    parser.add_argument('--draft', action='store_true',
+                        help='benchmark the draft profile (same as FIGURE_PROFILE=draft)')
+    args = parser.parse_args(argv)
+    if args.draft:
+        common.use_profile('draft')
+
+    render.load_chapters()
+    figures = render.select_figures(args.only)
+    if not figures:
+        print(f"No figures match {', '.join(args.only)}", file=sys.stderr)
+        return 1
+
+    print(f"{'figure':40s} {'wall':>9s} {'cpu':>9s} {'peak RSS':>12s} {'artists':>7s} {'output':>13s}")
+    results = run_benchmarks([spec.id for spec in figures], max(1, args.repeat))
+
+    history_path = args.history
+    history = load_history(history_path)
+    host = platform.node()
+    previous = [run for run in history
+                if run['profile'] == common.PROFILE and run.get('host') == host]
+    previous = previous[-max(1, args.window):]
+    history.append({
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'host': host,
+        'profile': common.PROFILE,
+        'versions': json.loads(common.library_versions()),
+        'results': results,
+    })
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    history_path.write_text(json.dumps(history, indent=2) + "\n")
+
+    total = sum(metrics['wall_s'] for metrics in results.values())
+    print(f"Benchmarked {len(results)} figures ({total:.2f}s of figure time); "
+          f"history: {os.path.relpath(history_path)}")
+    if not previous:
+        print(f"No previous {common.PROFILE} run on {host} to compare against")
+        return 0
+
+    regressions = find_regressions(results, baseline_results(previous), args.threshold)
+    for figure_id, metric, old, new in regressions:
+        growth = f"+{new / old - 1:.0%}" if old else "new"
+        print(f"  REGRESSION  {figure_id} {metric}: {old} -> {new} ({growth})")
+    print(f"{len(regressions)} regression(s) above {args.threshold:.0%} against the median of "
+          f"{len(previous)} run(s) since {previous[0]['commit'] or previous[0]['timestamp']}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 1: The Deadly Ignorance of Position."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style, table
+import datasets
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
+from tables import booktabs, escape, span
 
 
+@figure('latitude-geometry', chapter=1)
 def latitude_geometry():
     """Geometric relationship between latitude and celestial pole altitude.
 
@@ -113,9 +116,10 @@ def latitude_geometry():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'latitude-geometry', chapter=1)
+    return fig
 
 
+@figure('dead-reckoning-error', chapter=1)
 def dead_reckoning_error():
     """Cumulative error growth in dead reckoning navigation.
 
@@ -125,20 +129,12 @@ def dead_reckoning_error():
     setup_style()
     fig, ax = plt.subplots()
 
-    # Data points from historical records (days, min_error_nm, max_error_nm)
-    # Based on table in chapter: tab:dead-reckoning-error
-    data_points = np.array([
-        [0, 0, 0],
-        [5, 10, 20],
-        [10, 30, 50],
-        [20, 60, 100],
-        [30, 100, 150],
-        [40, 150, 250],
-    ])
-
-    days = data_points[:, 0]
-    error_min = data_points[:, 1]
-    error_max = data_points[:, 2]
+    # Data points from historical records, shared with the chapter's
+    # table (tab:dead-reckoning-error)
+    data = datasets.load('dead_reckoning_error')
+    days = data['days']
+    error_min = data['error_min_nm']
+    error_max = data['error_max_nm']
     error_mid = (error_min + error_max) / 2
 
     # Interpolate for smooth curves
@@ -176,9 +172,21 @@ def dead_reckoning_error():
     # Add grid
     ax.grid(True, alpha=0.3)
 
-    save_figure(fig, 'dead-reckoning-error', chapter=1)
+    return fig
+
+
+@table('dead-reckoning-error', chapter=1)
+def dead_reckoning_error_table():
+    """Table of dead-reckoning error by days at sea (tab:dead-reckoning-error)."""
+    data = datasets.load('dead_reckoning_error')
+    at_sea = data.filter(data['days'] > 0)
+    rows = []
+    for days, low, high, characteristics, note in at_sea.rows():
+        label = f"{days} ({escape(note)})" if note else f"{days}"
+        rows.append([label, span(low, high), escape(characteristics)])
+    return booktabs(['Days at Sea', 'Typical Error (nm)', 'Characteristics'], rows)
 
 
 if __name__ == "__main__":
-    latitude_geometry()
-    dead_reckoning_error()
+    from render import main
+    raise SystemExit(main(["--only", "ch01-*"]))
@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 2: The Founding of the Royal Observatory."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
+import datasets
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
 
 
+@figure('catalog-precision', chapter=2)
 def precision_comparison():
     """Compare positional accuracy of major star catalogs.
 
@@ -17,19 +19,15 @@ def precision_comparison():
     fig, ax = plt.subplots(figsize=(6, 4))
 
     # Historical catalog precision data (arc-seconds)
-    catalogs = [
-        ('Hipparchus\n(~130 BCE)', 3600, '#888888'),  # ~1 degree
-        ('Ptolemy\n(~150 CE)', 1800, '#888888'),  # ~30 arc-min
-        ('Ulugh Beg\n(1437)', 300, '#888888'),  # ~5 arc-min
-        ('Tycho Brahe\n(1598)', 60, '#555555'),  # ~1 arc-min
-        ('Flamsteed\n(1712)', 15, '#1f77b4'),  # 10-20 arc-sec, use midpoint
-    ]
+    catalogs = datasets.load('catalog_precision')
+    highlights = {'Tycho Brahe': '#555555', 'Flamsteed': '#1f77b4'}
 
-    names = [c[0] for c in catalogs]
-    errors = [c[1] for c in catalogs]
-    colors = [c[2] for c in catalogs]
+    names = [f'{catalog}\n({date})' for catalog, date in
+             zip(catalogs['catalog'].tolist(), catalogs['date'].tolist())]
+    errors = catalogs['error_arcsec']
+    colors = [highlights.get(catalog, '#888888') for catalog in catalogs['catalog'].tolist()]
 
-    y_pos = np.arange(len(catalogs))
+    y_pos = np.arange(len(names))
 
     # Horizontal bar chart
     bars = ax.barh(y_pos, errors, color=colors, edgecolor='black', linewidth=0.5)
@@ -37,9 +35,9 @@ def precision_comparison():
     # Add value labels
     for i, (bar, error) in enumerate(zip(bars, errors)):
         if error >= 60:
-            label = f"{error // 60}'"  # arc-minutes
+            label = f"{error / 60:.0f}'"  # arc-minutes
         else:
-            label = f'{error}"'  # arc-seconds
+            label = f'{error:g}"'  # arc-seconds
         ax.text(error + 50, bar.get_y() + bar.get_height()/2,
                 label, va='center', fontsize=9)
 
@@ -63,9 +61,10 @@ def precision_comparison():
     ax.invert_yaxis()
     ax.grid(True, axis='x', alpha=0.3)
 
-    save_figure(fig, 'catalog-precision', chapter=2)
+    return fig
 
 
+@figure('mural-arc-principle', chapter=2)
 def mural_arc_principle():
     """Diagram showing the principle of the mural arc meridian transit.
 
@@ -154,9 +153,9 @@ def mural_arc_principle():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'mural-arc-principle', chapter=2)
+    return fig
 
 
 if __name__ == "__main__":
-    precision_comparison()
-    mural_arc_principle()
+    from render import main
+    raise SystemExit(main(["--only", "ch02-*"]))
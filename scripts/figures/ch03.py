@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 3: Instruments and Methods of the Observatory."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyArrowPatch, Arc
 import numpy as np
 
 
+@figure('celestial-coordinates', chapter=3)
 def celestial_coordinates():
     """Diagram of the celestial coordinate system.
 
@@ -104,9 +105,10 @@ def celestial_coordinates():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'celestial-coordinates', chapter=3)
+    return fig
 
 
+@figure('atmospheric-refraction', chapter=3)
 def atmospheric_refraction():
     """Diagram showing atmospheric refraction effect on star observations.
 
@@ -194,9 +196,10 @@ def atmospheric_refraction():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'atmospheric-refraction', chapter=3)
+    return fig
 
 
+@figure('instrument-precision', chapter=3)
 def instrument_precision():
     """Relationship between instrument radius and achievable precision.
 
@@ -253,10 +256,9 @@ def instrument_precision():
     ax.text(4.5, 85, 'Other factors: telescope use,\nclock timing, observer skill',
             fontsize=8, ha='center', style='italic', color='#555555')
 
-    save_figure(fig, 'instrument-precision', chapter=3)
+    return fig
 
 
 if __name__ == "__main__":
-    celestial_coordinates()
-    atmospheric_refraction()
-    instrument_precision()
+    from render import main
+    raise SystemExit(main(["--only", "ch03-*"]))
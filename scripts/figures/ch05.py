@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 5: Building the Historia Coelestis Britannica."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
+import precession
+import streaming
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, FancyArrowPatch
 import numpy as np
 
 
+@figure('reduction-pipeline', chapter=5)
 def reduction_pipeline():
     """Flowchart showing the data reduction process from raw observation
     to final catalog coordinates.
@@ -74,9 +77,10 @@ def reduction_pipeline():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'reduction-pipeline', chapter=5)
+    return fig
 
 
+@figure('precession-drift', chapter=5)
 def precession_drift():
     """Visualization of how precession shifts star positions over decades.
 
@@ -85,16 +89,26 @@ def precession_drift():
     setup_style()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(7, 3.5))
 
-    # Precession rate: ~50 arcsec/year in RA, ~20 arcsec/year in Dec
-    years = np.arange(1676, 1720, 1)
+    years = np.arange(1676, 1721, 1)
     base_year = 1690
 
-    # Calculate drift from base epoch
-    delta_years = years - base_year
-    ra_drift = 50 * delta_years  # arcseconds
-    dec_drift = 20 * np.cos(np.radians(45)) * delta_years  # simplified, for star at RA=45deg
-
-    # Plot RA drift
+    # A catalog the size of Flamsteed's, spread over the sky visible from
+    # Greenwich, with the example star (RA 45 deg, Dec +20 deg) first
+    rng = np.random.default_rng(1725)
+    n_stars = 2935
+    ra = rng.uniform(0, 360, n_stars)
+    dec = np.degrees(np.arcsin(rng.uniform(-0.6, 1, n_stars)))
+    ra[0], dec[0] = 45, 20
+
+    # Drift of every star from the catalog epoch, in one batched rotation
+    ra_now, dec_now = precession.precess(ra, dec, base_year, years)
+    ra_drift_all = ((ra_now - ra[:, np.newaxis] + 180) % 360 - 180) * 3600  # arcseconds
+    dec_drift_all = (dec_now - dec[:, np.newaxis]) * 3600
+    ra_drift, dec_drift = ra_drift_all[0], dec_drift_all[0]
+
+    # Plot RA drift: the example star, and the middle 90% of the catalog
+    ra_low, ra_high = np.percentile(ra_drift_all, [5, 95], axis=0)
+    ax1.fill_between(years, ra_low, ra_high, color='gray', alpha=0.15, linewidth=0)
     ax1.plot(years, ra_drift, 'b-', linewidth=1.5)
     ax1.axhline(y=0, color='gray', linestyle='--', linewidth=0.8)
     ax1.axvline(x=base_year, color='red', linestyle=':', linewidth=1, alpha=0.7)
@@ -107,6 +121,8 @@ def precession_drift():
     ax1.grid(True, alpha=0.3)
 
     # Plot Dec drift
+    dec_low, dec_high = np.percentile(dec_drift_all, [5, 95], axis=0)
+    ax2.fill_between(years, dec_low, dec_high, color='gray', alpha=0.15, linewidth=0)
     ax2.plot(years, dec_drift, 'orange', linewidth=1.5)
     ax2.axhline(y=0, color='gray', linestyle='--', linewidth=0.8)
     ax2.axvline(x=base_year, color='red', linestyle=':', linewidth=1, alpha=0.7)
@@ -119,15 +135,17 @@ def precession_drift():
     ax2.grid(True, alpha=0.3)
 
     # Common annotation
-    fig.text(0.5, 0.02, 'Precession rate: approximately 50 arcsec/year',
+    fig.text(0.5, 0.02, 'Lines: star at RA 45 deg, Dec +20 deg. '
+             f'Grey: middle 90 per cent of a {n_stars}-star catalog',
              ha='center', fontsize=8, style='italic')
 
     plt.tight_layout()
     plt.subplots_adjust(bottom=0.18)
 
-    save_figure(fig, 'precession-drift', chapter=5)
+    return fig
 
 
+@figure('error-averaging', chapter=5)
 def error_averaging():
     """Show how averaging multiple observations reduces uncertainty.
 
@@ -136,18 +154,36 @@ def error_averaging():
     setup_style()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(7, 3.5))
 
-    np.random.seed(42)
+    rng = np.random.default_rng(42)
 
-    # Simulate individual observations with ~15 arcsec random error
+    # Simulate 10^4 observers, each making up to 1000 observations with ~15
+    # arcsec random error, streamed in blocks so memory stays small. The first
+    # observer is the one drawn in detail.
     true_position = 0  # arbitrary reference
     single_error = 15  # arcseconds
+    n_observers = 10_000
+    n_max = 1000
     n_obs = 30
 
-    observations = np.random.normal(true_position, single_error, n_obs)
-    obs_numbers = np.arange(1, n_obs + 1)
-
-    # Plot individual observations
-    ax1.scatter(obs_numbers, observations, s=30, alpha=0.7, c='#1f77b4',
+    stats = streaming.RunningStats((n_observers,))
+    running_mean, running_std, spread = [], [], []
+    for start, stop in streaming.blocks(n_max, 100):
+        block = rng.normal(true_position, single_error, (n_observers, stop - start))
+        if start == 0:
+            observations = block[0, :n_obs]
+        count, mean, variance = stats.accumulate(block)
+        running_mean.append(mean[0])
+        running_std.append(np.sqrt(variance[0] / count))
+        # Spread of the running mean across observers
+        spread.append(np.sqrt(np.mean((mean - true_position) ** 2, axis=0)))
+    obs_numbers = np.arange(1, n_max + 1)
+    running_mean = np.concatenate(running_mean)
+    running_std = np.concatenate(running_std)
+    running_std[0] = single_error
+    spread = np.concatenate(spread)
+
+    # Plot individual observations of the first observer
+    ax1.scatter(obs_numbers[:n_obs], observations, s=30, alpha=0.7, c='#1f77b4',
                 edgecolors='black', linewidth=0.5)
     ax1.axhline(y=true_position, color='red', linestyle='-', linewidth=1.5,
                 label='True position')
@@ -166,11 +202,14 @@ def error_averaging():
     ax1.set_ylim(-45, 45)
     ax1.grid(True, alpha=0.3)
 
-    # Plot running average and uncertainty
-    running_mean = np.cumsum(observations) / obs_numbers
-    running_std = np.array([np.std(observations[:i], ddof=1) / np.sqrt(i)
-                           if i > 1 else single_error for i in obs_numbers])
+    # Convergence envelope: 1 and 2 standard deviations of the running mean
+    # over all observers
+    ax2.fill_between(obs_numbers, -2 * spread, 2 * spread, color='gray', alpha=0.15,
+                     linewidth=0)
+    ax2.fill_between(obs_numbers, -spread, spread, color='gray', alpha=0.25, linewidth=0,
+                     label=f'Spread of {n_observers:,} observers')
 
+    # Running average and uncertainty of the first observer
     ax2.plot(obs_numbers, running_mean, 'g-', linewidth=1.5, label='Running mean')
     ax2.fill_between(obs_numbers, running_mean - running_std, running_mean + running_std,
                      alpha=0.3, color='green', label='Standard error')
@@ -181,23 +220,23 @@ def error_averaging():
     ax2.plot(obs_numbers, theoretical_error, 'k:', linewidth=1, alpha=0.5)
     ax2.plot(obs_numbers, -theoretical_error, 'k:', linewidth=1, alpha=0.5)
 
+    ax2.set_xscale('log')
     ax2.set_xlabel('Number of observations')
     ax2.set_ylabel('Position error (arcseconds)')
     ax2.set_title('Averaging Improvement')
-    ax2.legend(loc='upper right', fontsize=8)
-    ax2.set_xlim(0, n_obs + 2)
+    ax2.legend(loc='upper right', fontsize=7)
+    ax2.set_xlim(1, n_max)
     ax2.set_ylim(-20, 20)
     ax2.grid(True, alpha=0.3)
 
     # Annotation
-    ax2.text(25, -15, r'Error $\propto 1/\sqrt{n}$', fontsize=9, style='italic')
+    ax2.text(40, -15, r'Error $\propto 1/\sqrt{n}$', fontsize=9, style='italic')
 
     plt.tight_layout()
 
-    save_figure(fig, 'error-averaging', chapter=5)
+    return fig
 
 
 if __name__ == "__main__":
-    reduction_pipeline()
-    precession_drift()
-    error_averaging()
+    from render import main
+    raise SystemExit(main(["--only", "ch05-*"]))
@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 6: The Clock Problem, Part One: Pendulum Limitations."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyArrowPatch, Arc, Circle, Wedge
 import numpy as np
 
 
+@figure('pendulum-physics', chapter=6)
 def pendulum_physics():
     """Diagram showing pendulum geometry, forces, and the restoring torque.
     """
@@ -95,9 +96,10 @@ def pendulum_physics():
     ax2.axis('off')
 
     plt.tight_layout()
-    save_figure(fig, 'pendulum-physics', chapter=6)
+    return fig
 
 
+@figure('temperature-error', chapter=6)
 def temperature_error():
     """Show how thermal expansion accumulates into clock error over a day.
     """
@@ -148,9 +150,10 @@ def temperature_error():
     ax2.grid(True, axis='y', alpha=0.3)
 
     plt.tight_layout()
-    save_figure(fig, 'temperature-error', chapter=6)
+    return fig
 
 
+@figure('gravity-latitude', chapter=6)
 def gravity_latitude():
     """Show how gravitational acceleration varies with latitude.
     """
@@ -220,9 +223,10 @@ def gravity_latitude():
     ax2.text(-55, 4.8, 'Clock\ngains time', fontsize=8, color='#2ca02c', ha='center')
 
     plt.tight_layout()
-    save_figure(fig, 'gravity-latitude', chapter=6)
+    return fig
 
 
+@figure('ship-motion', chapter=6)
 def ship_motion():
     """Show how ship acceleration affects effective gravity and pendulum behavior.
     """
@@ -295,11 +299,9 @@ def ship_motion():
              fontsize=8, style='italic', ha='center', transform=ax2.get_xaxis_transform())
 
     plt.tight_layout()
-    save_figure(fig, 'ship-motion', chapter=6)
+    return fig
 
 
 if __name__ == "__main__":
-    pendulum_physics()
-    temperature_error()
-    gravity_latitude()
-    ship_motion()
+    from render import main
+    raise SystemExit(main(["--only", "ch06-*"]))
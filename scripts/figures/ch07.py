@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 7: The Longitude Act and Its Incentives."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch
 import numpy as np
 
 
+@figure('prize-thresholds', chapter=7)
 def prize_thresholds():
     """Visualize the relationship between accuracy requirements and prize amounts.
     """
@@ -63,9 +64,10 @@ def prize_thresholds():
     plt.tight_layout()
     plt.subplots_adjust(bottom=0.15)
 
-    save_figure(fig, 'prize-thresholds', chapter=7)
+    return fig
 
 
+@figure('board-timeline', chapter=7)
 def board_timeline():
     """Timeline of key Board of Longitude decisions.
     """
@@ -124,9 +126,10 @@ def board_timeline():
     ax.set_ylim(-1, 1)
     ax.axis('off')
 
-    save_figure(fig, 'board-timeline', chapter=7)
+    return fig
 
 
+@figure('competing-methods', chapter=7)
 def competing_methods():
     """Comparison of the four proposed longitude methods.
     """
@@ -172,10 +175,9 @@ def competing_methods():
 
     plt.tight_layout()
 
-    save_figure(fig, 'competing-methods', chapter=7)
+    return fig
 
 
 if __name__ == "__main__":
-    prize_thresholds()
-    board_timeline()
-    competing_methods()
+    from render import main
+    raise SystemExit(main(["--only", "ch07-*"]))
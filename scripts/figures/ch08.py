@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 8: The Lunar Distance Method."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, Arc, Circle
 import numpy as np
 
 
+@figure('lunar-parallax', chapter=8)
 def lunar_parallax():
     """Diagram showing the effect of parallax on lunar observations.
 
@@ -76,9 +77,10 @@ def lunar_parallax():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'lunar-parallax', chapter=8)
+    return fig
 
 
+@figure('clearing-procedure', chapter=8)
 def clearing_procedure():
     """Flowchart showing the clearing procedure for lunar distances.
     """
@@ -134,9 +136,10 @@ def clearing_procedure():
     ax.set_ylim(-2, 6)
     ax.axis('off')
 
-    save_figure(fig, 'clearing-procedure', chapter=8)
+    return fig
 
 
+@figure('lunar-distance-errors', chapter=8)
 def lunar_distance_errors():
     """Bar chart showing error sources in lunar distance method.
     """
@@ -170,9 +173,10 @@ def lunar_distance_errors():
 
     plt.tight_layout()
 
-    save_figure(fig, 'lunar-distance-errors', chapter=8)
+    return fig
 
 
+@figure('moon-motion-rate', chapter=8)
 def moon_motion_rate():
     """Show the Moon's motion rate among the stars.
     """
@@ -213,11 +217,9 @@ def moon_motion_rate():
             bbox=dict(boxstyle='round,pad=0.3', facecolor='white',
                       edgecolor='#cccccc'))
 
-    save_figure(fig, 'moon-motion-rate', chapter=8)
+    return fig
 
 
 if __name__ == "__main__":
-    lunar_parallax()
-    clearing_procedure()
-    lunar_distance_errors()
-    moon_motion_rate()
+    from render import main
+    raise SystemExit(main(["--only", "ch08-*"]))
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 9: Harrison's Chronometers: H1 through H5."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
+import datasets
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, Arc, Circle, Rectangle
 import numpy as np
 
 
+@figure('chronometer-evolution', chapter=9)
 def chronometer_evolution():
     """Timeline showing the evolution of Harrison's chronometers.
     """
@@ -62,9 +64,10 @@ def chronometer_evolution():
     ax.set_ylim(-0.7, 0.7)
     ax.axis('off')
 
-    save_figure(fig, 'chronometer-evolution', chapter=9)
+    return fig
 
 
+@figure('temperature-compensation', chapter=9)
 def temperature_compensation():
     """Diagram showing how bimetallic compensation works.
     """
@@ -127,9 +130,10 @@ def temperature_compensation():
     ax2.text(20, 30, '25x\nimprovement', fontsize=8, ha='center', color='green')
 
     plt.tight_layout()
-    save_figure(fig, 'temperature-compensation', chapter=9)
+    return fig
 
 
+@figure('trial-performance', chapter=9)
 def trial_performance():
     """Bar chart comparing performance of Harrison's chronometers in trials.
     """
@@ -137,11 +141,12 @@ def trial_performance():
     fig, ax = plt.subplots(figsize=(6, 4))
 
     # Trial data
-    trials = ['H1\nJamaica\n1735', 'H4\nJamaica\n1762', 'H4\nBarbados\n1764',
-              'H5\nKing\n1772']
-    errors = [54, 5.1, 39.2, 4.5]  # seconds accumulated
-    durations = ['months', '81 days', '5 months', '10 weeks']
-    colors = ['#1f77b4', '#d62728', '#d62728', '#9467bd']
+    data = datasets.load('chronometer_trials')
+    trials = [f'{watch}\n{voyage}\n{year}' for watch, voyage, year in
+              data.select('watch', 'voyage', 'year').rows()]
+    errors = data['error_s']  # seconds accumulated
+    palette = {'H1': '#1f77b4', 'H4': '#d62728', 'H5': '#9467bd'}
+    colors = [palette[watch] for watch in data['watch'].tolist()]
 
     bars = ax.bar(trials, errors, color=colors, edgecolor='black', linewidth=0.5)
 
@@ -154,7 +159,7 @@ def trial_performance():
     for bar, err in zip(bars, errors):
         height = bar.get_height()
         ax.text(bar.get_x() + bar.get_width()/2, height + 2,
-                f'{err}s', ha='center', fontsize=9, fontweight='bold')
+                f'{err:g}s', ha='center', fontsize=9, fontweight='bold')
 
     ax.set_ylabel('Accumulated error (seconds)')
     ax.set_title("Harrison's Chronometer Trial Results", fontsize=10)
@@ -166,9 +171,10 @@ def trial_performance():
             fontsize=8, style='italic', ha='center', transform=ax.transAxes)
 
     plt.tight_layout()
-    save_figure(fig, 'trial-performance', chapter=9)
+    return fig
 
 
+@figure('linked-balance', chapter=9)
 def linked_balance():
     """Diagram showing the linked balance principle.
     """
@@ -215,9 +221,10 @@ def linked_balance():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'linked-balance', chapter=9)
+    return fig
 
 
+@figure('error-sources', chapter=9)
 def error_sources():
     """Pie chart showing sources of residual error in H4.
     """
@@ -239,12 +246,9 @@ def error_sources():
 
     ax.set_title('H4 Residual Error Sources\n(5.1 seconds over 81 days)', fontsize=10)
 
-    save_figure(fig, 'error-sources', chapter=9)
+    return fig
 
 
 if __name__ == "__main__":
-    chronometer_evolution()
-    temperature_compensation()
-    trial_performance()
-    linked_balance()
-    error_sources()
+    from render import main
+    raise SystemExit(main(["--only", "ch09-*"]))
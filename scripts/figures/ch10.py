@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 10: Maskelyne's Nautical Almanac."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, Circle, Rectangle
 import numpy as np
 
 
+@figure('navigator-procedure', chapter=10)
 def navigator_procedure():
     """Flowchart of the 6-step lunar distance procedure.
     """
@@ -63,9 +64,10 @@ def navigator_procedure():
     ax.set_ylim(-1.2, 5.8)
     ax.axis('off')
 
-    save_figure(fig, 'navigator-procedure', chapter=10)
+    return fig
 
 
+@figure('almanac-structure', chapter=10)
 def almanac_structure():
     """Diagram showing the structure of the Nautical Almanac tables.
     """
@@ -110,9 +112,10 @@ def almanac_structure():
     ax.set_ylim(-0.2, 5.2)
     ax.axis('off')
 
-    save_figure(fig, 'almanac-structure', chapter=10)
+    return fig
 
 
+@figure('chronometer-vs-almanac', chapter=10)
 def chronometer_vs_almanac():
     """Comparison of chronometer vs lunar distance methods.
     """
@@ -152,9 +155,10 @@ def chronometer_vs_almanac():
             fontsize=8, style='italic', ha='center', transform=ax.transAxes)
 
     plt.tight_layout()
-    save_figure(fig, 'chronometer-vs-almanac', chapter=10)
+    return fig
 
 
+@figure('computer-network', chapter=10)
 def computer_network():
     """Diagram showing the distributed computer network.
     """
@@ -201,11 +205,9 @@ def computer_network():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'computer-network', chapter=10)
+    return fig
 
 
 if __name__ == "__main__":
-    navigator_procedure()
-    almanac_structure()
-    chronometer_vs_almanac()
-    computer_network()
+    from render import main
+    raise SystemExit(main(["--only", "ch10-*"]))
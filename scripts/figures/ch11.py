@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 11: Edmond Halley's Broader Canvas."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
+import kepler
+import lifetable
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import Circle, Ellipse, FancyArrowPatch, Arc
 import numpy as np
 
 
+@figure('transit-parallax', chapter=11)
 def transit_parallax():
     """Diagram showing how transit parallax reveals the solar distance.
     """
@@ -81,9 +84,10 @@ def transit_parallax():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'transit-parallax', chapter=11)
+    return fig
 
 
+@figure('halley-comet-orbit', chapter=11)
 def halley_comet_orbit():
     """Visualization of Halley's comet elliptical orbit.
     """
@@ -105,6 +109,20 @@ def halley_comet_orbit():
     scale = 0.15
     ax.plot(x * scale, y * scale, 'gray', linewidth=1.5, alpha=0.7)
 
+    # Where the comet is each year after its 1759 return, from Kepler's
+    # equation: the yearly steps bunch up near aphelion, where it moves slowest
+    period = a ** 1.5  # years
+    perihelion_time = 1759.2  # 13 March 1759
+    years = np.arange(1760, 1835)
+    x_year, y_year = kepler.orbit_position(
+        kepler.mean_anomaly(years, perihelion_time, period), a, e)
+    ax.plot(x_year * scale, y_year * scale, 'o', color='#d62728', markersize=2)
+    for year, x_tick, y_tick in zip(years, x_year * scale, y_year * scale):
+        if year % 10 == 0 and 0.5 < abs(x_tick) < 4.5:
+            ax.text(x_tick, y_tick + (0.12 if y_tick > 0 else -0.12), str(year),
+                    fontsize=6, ha='center', va='bottom' if y_tick > 0 else 'top',
+                    color='#d62728')
+
     # Sun at focus
     sun = Circle((0, 0), 0.1, facecolor='#FFD700', edgecolor='black', linewidth=1)
     ax.add_patch(sun)
@@ -134,6 +152,7 @@ def halley_comet_orbit():
                 arrowprops=dict(arrowstyle='->', color='gray', lw=1))
 
     # Period annotation
+    ax.text(-4.5, -1.0, 'Dots: position each year', fontsize=7, color='#d62728')
     ax.text(0, -2.5, 'Orbital period: 76 years\n' +
             "Halley's prediction (1705): return in 1758\n" +
             'Observed return: December 1758',
@@ -146,9 +165,10 @@ def halley_comet_orbit():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'halley-comet-orbit', chapter=11)
+    return fig
 
 
+@figure('magnetic-variation', chapter=11)
 def magnetic_variation():
     """Conceptual diagram of magnetic variation (isogonic lines).
     """
@@ -216,40 +236,32 @@ def magnetic_variation():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'magnetic-variation', chapter=11)
+    return fig
 
 
+@figure('halley-life-table', chapter=11)
 def halley_life_table():
     """Visualization of Halley's life table concept.
     """
     setup_style()
     fig, ax = plt.subplots(figsize=(6, 4))
 
-    # Simplified survival curve based on Halley's Breslau data
-    ages = np.arange(0, 85, 1)
-
-    # Approximate survival curve (not actual Halley data, illustrative)
-    # High infant mortality, then slower decline
-    survival = np.zeros_like(ages, dtype=float)
-    survival[0] = 1000
-    for i in range(1, len(ages)):
-        if i < 5:
-            mortality_rate = 0.15  # High infant mortality
-        elif i < 20:
-            mortality_rate = 0.02
-        elif i < 50:
-            mortality_rate = 0.015
-        elif i < 70:
-            mortality_rate = 0.04
-        else:
-            mortality_rate = 0.08
-        survival[i] = survival[i-1] * (1 - mortality_rate)
-
-    # Normalize to start at 1000
-    survival = survival / survival[0] * 1000
-
-    ax.plot(ages, survival, 'b-', linewidth=1.5)
-    ax.fill_between(ages, 0, survival, alpha=0.2)
+    # Halley's Breslau table, and the hazards it implies
+    ages, persons = lifetable.halley_breslau()
+    q = lifetable.hazards(persons)
+
+    # Sensitivity band: 2000 schedules with each age band's mortality scaled
+    # by an independent factor of about +/-15%
+    edges = [1, 6, 20, 50, 70, 85]
+    schedules = lifetable.perturbed_hazards(q, edges, ages[:-1], spread=0.15, samples=2000)
+    cohorts = lifetable.survivors(schedules, radix=persons[0])
+    low, high = np.percentile(cohorts, [5, 95], axis=0)
+    expectancy = lifetable.life_expectancy(cohorts)[:, 0]
+    survival = dict(zip(ages, persons))
+
+    ax.fill_between(ages, low, high, color='blue', alpha=0.2, linewidth=0,
+                    label='2000 perturbed schedules (5th to 95th percentile)')
+    ax.plot(ages, persons, 'b-', linewidth=1.5, label="Halley's table")
 
     # Mark key ages
     key_ages = [1, 20, 50, 70]
@@ -260,21 +272,24 @@ def halley_life_table():
                     fontsize=7, arrowprops=dict(arrowstyle='->', lw=0.5))
 
     ax.set_xlabel('Age (years)')
-    ax.set_ylabel('Survivors (from 1000 births)')
+    ax.set_ylabel('Persons living (of 1000 in first year)')
     ax.set_title("Halley's Life Table (Breslau, 1693)", fontsize=10)
     ax.set_xlim(0, 85)
+    ax.legend(loc='upper right', fontsize=7)
     ax.set_ylim(0, 1100)
     ax.grid(True, alpha=0.3)
 
     # Annotation
-    ax.text(50, 900, 'First actuarial\nlife table', fontsize=8, style='italic')
+    ax.text(50, 720, 'First actuarial\nlife table', fontsize=8, style='italic')
+    e_low, e_high = np.percentile(expectancy, [5, 95])
+    ax.text(50, 580, f'Expectation of life at age 1:\n'
+            f'{lifetable.life_expectancy(persons)[0]:.1f} years ({e_low:.1f} to {e_high:.1f})',
+            fontsize=7)
 
     plt.tight_layout()
-    save_figure(fig, 'halley-life-table', chapter=11)
+    return fig
 
 
 if __name__ == "__main__":
-    transit_parallax()
-    halley_comet_orbit()
-    magnetic_variation()
-    halley_life_table()
+    from render import main
+    raise SystemExit(main(["--only", "ch11-*"]))
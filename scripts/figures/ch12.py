@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 12: Bradley and the Aberration of Starlight."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
+import aberration
+import ephemeris
+import fitting
+import nutation
+import precession
 import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, Circle, FancyArrowPatch, Arc, Wedge
+from matplotlib.collections import LineCollection
 import numpy as np
 
 
+@figure('aberration-geometry', chapter=12)
 def aberration_geometry():
     """Diagram showing how Earth's motion causes aberration of starlight.
 
@@ -98,9 +104,10 @@ def aberration_geometry():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'aberration-geometry', chapter=12)
+    return fig
 
 
+@figure('aberration-ellipse', chapter=12)
 def aberration_ellipse():
     """Shows how a star traces an aberration ellipse over a year.
 
@@ -108,37 +115,33 @@ def aberration_ellipse():
     apparent stellar position to trace out an ellipse.
     """
     setup_style()
-    fig, ax = plt.subplots(figsize=(6, 6))
+    fig, (ax, sky_ax) = plt.subplots(1, 2, figsize=(11, 5.5), width_ratios=[1, 1.4])
 
     # Central true position
     ax.plot(0, 0, '*', color='gold', markersize=20,
             markeredgecolor='black', markeredgewidth=1)
-    ax.text(0.1, -0.1, 'True\nposition', fontsize=8, ha='left', va='top')
-
-    # Aberration circle (for a star at pole of ecliptic)
-    # For stars off the ecliptic pole, it's an ellipse
-    kappa = 20.5  # arcseconds
-    theta = np.linspace(0, 2*np.pi, 100)
-
-    # Circle for star at ecliptic pole
-    x_circle = kappa * np.cos(theta)
-    y_circle = kappa * np.sin(theta)
-    ax.plot(x_circle, y_circle, 'b-', linewidth=2, alpha=0.7,
-            label='Star at ecliptic pole')
-
-    # Ellipse for star at 45° from ecliptic pole
-    x_ellipse = kappa * np.cos(theta)
-    y_ellipse = kappa * np.sin(theta) * np.sin(np.radians(45))
-    ax.plot(x_ellipse, y_ellipse, 'r--', linewidth=2, alpha=0.7,
-            label='Star at 45° ecliptic latitude')
+    ax.text(1, -1, 'True\nposition', fontsize=8, ha='left', va='top')
+
+    # Displacement over a year of stars at three ecliptic latitudes, in the
+    # ecliptic frame: x along the ecliptic, y towards its pole
+    times = np.arange(np.datetime64('2001-01-01'), np.datetime64('2002-01-01'))
+    latitudes = [90, 45, 15]
+    styles = [('b-', 'Star at ecliptic pole'),
+              ('r--', 'Star at 45° ecliptic latitude'),
+              ('g:', 'Star at 15° ecliptic latitude')]
+    east, north = aberration.displacements(np.full(len(latitudes), 270.0), latitudes,
+                                           times, frame='ecliptic')
+    for x_track, y_track, (style, label) in zip(east, north, styles):
+        ax.plot(np.append(x_track, x_track[0]), np.append(y_track, y_track[0]), style,
+                linewidth=2, alpha=0.7, label=label)
 
     # Mark positions at different times of year
     months = ['Mar', 'Jun', 'Sep', 'Dec']
-    angles = [0, np.pi/2, np.pi, 3*np.pi/2]
+    dates = np.array(['2001-03-20', '2001-06-21', '2001-09-22', '2001-12-21'],
+                     dtype='datetime64[D]')
+    days = (dates - times[0]).astype(int)
 
-    for month, angle in zip(months, angles):
-        x = kappa * np.cos(angle)
-        y = kappa * np.sin(angle)
+    for month, x, y in zip(months, east[0, days], north[0, days]):
         ax.plot(x, y, 'ko', markersize=8)
 
         # Position label slightly outside
@@ -147,7 +150,7 @@ def aberration_ellipse():
                 ha='center', va='center')
 
     # Earth orbit (inset in corner)
-    inset_ax = fig.add_axes([0.12, 0.12, 0.25, 0.25])
+    inset_ax = ax.inset_axes([0.02, 0.02, 0.3, 0.3])
     sun = Circle((0, 0), 0.15, facecolor='#FFD700', edgecolor='black')
     inset_ax.add_patch(sun)
 
@@ -176,61 +179,115 @@ def aberration_ellipse():
     ax.grid(True, alpha=0.3)
     ax.set_aspect('equal')
 
-    save_figure(fig, 'aberration-ellipse', chapter=12)
+    # Whole sky: the major axis of every star's ellipse, shaded by how round
+    # the ellipse is
+    rng = np.random.default_rng(1729)
+    n_stars = 3000
+    ra = rng.uniform(0, 360, n_stars)
+    dec = np.degrees(np.arcsin(rng.uniform(-0.96, 0.96, n_stars)))
+    ellipses = aberration.ellipses(ra, dec)
+
+    # Major axes as segments 5 degrees long, mapped onto the RA-Dec grid
+    half_length = 2.5
+    angle = np.radians(ellipses.position_angle)
+    d_ra = half_length * np.sin(angle) / np.cos(np.radians(dec))
+    d_dec = half_length * np.cos(angle)
+    segments = np.stack([np.stack([ra - d_ra, dec - d_dec], axis=-1),
+                         np.stack([ra + d_ra, dec + d_dec], axis=-1)], axis=1)
+    axes_ratio = ellipses.semi_minor / ellipses.semi_major
+    collection = LineCollection(segments, array=axes_ratio, cmap='viridis',
+                                linewidths=1)
+    sky_ax.add_collection(collection)
+    fig.colorbar(collection, ax=sky_ax, shrink=0.8,
+                 label='Axis ratio of aberration ellipse')
+
+    # Ecliptic, along which the ellipses flatten into lines
+    ecliptic_longitude = np.radians(np.linspace(0, 360, 361))
+    obliquity = np.radians(23.44)
+    sky_ax.plot(np.degrees(np.arctan2(np.sin(ecliptic_longitude) * np.cos(obliquity),
+                                      np.cos(ecliptic_longitude))) % 360,
+                np.degrees(np.arcsin(np.sin(ecliptic_longitude) * np.sin(obliquity))),
+                'r.', markersize=1.5, label='Ecliptic')
+
+    sky_ax.set_xlim(360, 0)
+    sky_ax.set_ylim(-75, 75)
+    sky_ax.set_xticks(range(0, 361, 60))
+    sky_ax.set_xlabel('Right ascension (degrees)', fontsize=10)
+    sky_ax.set_ylabel('Declination (degrees)', fontsize=10)
+    sky_ax.set_title(f'Ellipse orientation across the sky ({n_stars} stars)', fontsize=10)
+    sky_ax.legend(loc='lower left', fontsize=8, markerscale=4)
+
+    plt.tight_layout()
+    return fig
 
 
+@figure('bradley-observations', chapter=12)
 def bradley_observations():
     """Bradley's observations of gamma Draconis showing the annual cycle.
 
-    Plots the sinusoidal variation due to aberration with the fitted model.
+    Fits amplitude, phase and offset of an annual sinusoid by least squares
+    to the four readings listed in the chapter's worked example, converts
+    the amplitude to the constant of aberration, and shades the 90% band of
+    4000 bootstrap refits. The modern aberration model only supplies the
+    ratio of the star's north-south swing to the constant.
     """
     setup_style()
     fig, ax = plt.subplots(figsize=(7, 4))
 
-    # Time axis (months from Jan 1726)
-    months = np.array([0, 2, 5, 8, 11, 14, 17])  # Selected observation epochs
-    month_labels = ['Dec 1725', 'Feb', 'May', 'Aug', 'Nov 1726', 'Feb 1727', 'May']
-
-    # Zenith distance observations (illustrative, based on text)
-    # Positive = north of zenith
-    observations = np.array([-20.5, -10, 15, 20, 5, -15, -20])
-
-    # Model: z = kappa * sin(2*pi*t/12 + phi)
-    t_model = np.linspace(0, 18, 200)
-    kappa = 20.5
-    phi = -0.5  # Phase offset
-    z_model = kappa * np.sin(2 * np.pi * t_model / 12 + phi)
-
-    # Plot
-    ax.plot(t_model, z_model, 'b-', linewidth=1.5, label='Aberration model')
-    ax.plot(months, observations, 'ko', markersize=8, label="Bradley's observations")
+    # The readings listed in the worked example (positive = north of zenith),
+    # with time in years from 1726 January 1
+    dates = np.array(['1726-03-01', '1726-06-01', '1726-09-01', '1726-12-01'], dtype='datetime64[D]')
+    observations = np.array([17.26, 10.10, -7.06, -20.47])
+    origin = np.datetime64('1726-01-01')
+    times = (dates - origin).astype(float) / 365.25
+    year = 1.0
+
+    # gamma Draconis (J2000), brought to Bradley's epoch
+    ra, dec = precession.precess([269.1515], [51.4889], 2000, [1726])
+
+    # The north-south aberration of gamma Draconis, which is what the zenith
+    # sector measured
+    t_model = np.linspace(-0.1, 1.1, 200)
+    _, z_model = aberration.displacements(ra[0], dec[0],
+                                          ephemeris.julian_date(origin) + t_model * 365.25)
+    z_model = z_model[0]
+
+    # The north-south swing of this star is a fixed fraction of the constant
+    # of aberration, read off the model, so a fitted amplitude gives kappa
+    swing = fitting.fit_sinusoid(t_model, z_model, year).amplitude / ephemeris.ABERRATION_CONSTANT
+    fit = fitting.fit_sinusoid(times, observations, year)
+    resamples = fitting.bootstrap(times, observations, year, samples=4000, seed=1725)
+    low, high = np.percentile(resamples.evaluate(t_model), [5, 95], axis=0)
+    kappa, kappa_error = fit.amplitude / swing, fit.amplitude_error / swing
+
+    # Plot, in months from 1726 January 1
+    months = 12 * t_model
+    ax.fill_between(months, low, high, color='#1f77b4', alpha=0.2, linewidth=0,
+                    label='90 per cent bootstrap band')
+    ax.plot(months, fit.evaluate(t_model), 'b-', linewidth=1.5, label='Least-squares fit')
+    ax.plot(12 * times, observations, 'ko', markersize=6, label='Listed observations')
 
     # Zero line
     ax.axhline(0, color='gray', linestyle='--', linewidth=0.5)
 
-    # Amplitude markers
-    ax.axhline(20.5, color='red', linestyle=':', linewidth=1, alpha=0.5)
-    ax.axhline(-20.5, color='red', linestyle=':', linewidth=1, alpha=0.5)
-    ax.text(18.5, 20.5, r'$+\kappa$', fontsize=9, va='center', color='red')
-    ax.text(18.5, -20.5, r'$-\kappa$', fontsize=9, va='center', color='red')
-
-    ax.set_xlabel('Months from December 1725', fontsize=10)
+    ax.set_xlabel('Months from January 1726', fontsize=10)
     ax.set_ylabel('Zenith distance (arcseconds)', fontsize=10)
-    ax.set_xlim(-1, 19)
-    ax.set_ylim(-30, 30)
-    ax.legend(loc='upper right', fontsize=9)
+    ax.set_xlim(-1.2, 13.2)
+    ax.set_ylim(-45, 45)
+    ax.legend(loc='upper right', fontsize=8)
     ax.grid(True, alpha=0.3)
 
     # Annotation
-    ax.text(9, -26, r'$z(t) = 20.5 \sin(2\pi t/T + \phi)$ where $T = 1$ year',
+    ax.text(6, -40, rf'Least-squares fit: $\kappa = {kappa:.1f} \pm {kappa_error:.1f}$ arcsec',
             fontsize=9, ha='center',
             bbox=dict(boxstyle='round,pad=0.3', facecolor='white',
                       edgecolor='#cccccc'))
 
     plt.tight_layout()
-    save_figure(fig, 'bradley-observations', chapter=12)
+    return fig
 
 
+@figure('stellar-effects-comparison', chapter=12)
 def stellar_effects_comparison():
     """Compare parallax, aberration, and nutation amplitudes.
 
@@ -267,76 +324,75 @@ def stellar_effects_comparison():
                       edgecolor='#cccccc'))
 
     plt.tight_layout()
-    save_figure(fig, 'stellar-effects-comparison', chapter=12)
+    return fig
 
 
+@figure('nutation-diagram', chapter=12)
 def nutation_diagram():
-    """Diagram showing Earth's nutation - the 18.6-year wobble.
+    """Nutation over the century from Bradley's first observations, from the IAU 1980 series.
 
-    Shows how the Moon's orbital plane causes a periodic nod in Earth's axis.
+    Left: nutation in longitude and obliquity at daily resolution, with the
+    principal 18.6-year term of the Moon's node alone for comparison; the
+    fortnightly and half-yearly terms thicken the curves. Right: the true
+    pole's path about the mean pole over one nodal cycle.
     """
     setup_style()
-    fig, ax = plt.subplots(figsize=(6, 5))
-
-    # Earth
-    earth = Circle((0, 0), 1, facecolor='#1f77b4', edgecolor='black',
-                   linewidth=1.5, alpha=0.7)
-    ax.add_patch(earth)
-
-    # Equatorial bulge (ellipse)
-    bulge = mpatches.Ellipse((0, 0), 2.3, 1.8, angle=0,
-                              facecolor='none', edgecolor='#1f77b4',
-                              linewidth=1, linestyle='--', alpha=0.5)
-    ax.add_patch(bulge)
-    ax.text(1.3, 0.6, 'Equatorial\nbulge', fontsize=7, ha='center', alpha=0.7)
-
-    # Mean rotation axis
-    ax.annotate('', xy=(0, 2.5), xytext=(0, -1.5),
-                arrowprops=dict(arrowstyle='->', color='black', lw=2))
-    ax.text(0.15, 2.3, 'Mean axis', fontsize=9, ha='left')
-
-    # Nutating axis (slight wobble)
-    nutation_angle = 0.15  # radians
-    ax.annotate('', xy=(nutation_angle * 2, 2.4), xytext=(0, -1.5),
-                arrowprops=dict(arrowstyle='->', color='#d62728', lw=2,
-                               linestyle='--'))
-
-    # Nutation cone
-    cone_theta = np.linspace(0, 2*np.pi, 100)
-    cone_radius = 0.3
-    cone_x = cone_radius * np.cos(cone_theta)
-    cone_y = 2.5 + cone_radius * np.sin(cone_theta) * 0.3
-    ax.plot(cone_x, cone_y, 'r-', linewidth=1, alpha=0.7)
-    ax.text(0.5, 2.7, 'Nutation\n(9" amplitude)', fontsize=8,
-            ha='left', color='#d62728')
-
-    # Moon orbit (inclined ellipse in background)
-    moon_theta = np.linspace(0, 2*np.pi, 100)
-    moon_x = 3 * np.cos(moon_theta)
-    moon_y = 0.8 * np.sin(moon_theta) + 0.5
-    ax.plot(moon_x, moon_y, 'gray', linewidth=1, alpha=0.5)
-    ax.plot(2.5, 1.0, 'o', color='#888888', markersize=10)
-    ax.text(2.7, 1.2, 'Moon', fontsize=8, color='gray')
-
-    # Torque arrow
-    ax.annotate('', xy=(1.5, 0.3), xytext=(2.2, 0.8),
-                arrowprops=dict(arrowstyle='->', color='green', lw=1.5))
-    ax.text(2.0, 0.2, 'Gravitational\ntorque', fontsize=8, color='green', ha='center')
-
-    # Period annotation
-    ax.text(0, -2.5, 'Period: 18.6 years\n(Lunar nodal regression)',
-            fontsize=9, ha='center',
-            bbox=dict(boxstyle='round,pad=0.3', facecolor='white',
-                      edgecolor='#cccccc'))
-
-    ax.set_xlim(-4, 4)
-    ax.set_ylim(-3, 3.5)
-    ax.set_aspect('equal')
-    ax.axis('off')
-
-    save_figure(fig, 'nutation-diagram', chapter=12)
-
-
+    fig, (ax, pole_ax) = plt.subplots(1, 2, figsize=(11, 4.5), width_ratios=[1.8, 1])
+
+    times = np.arange(np.datetime64('1727-01-01'), np.datetime64('1827-01-01'))
+    jd = ephemeris.julian_date(times)
+    years = 1727 + (jd - jd[0]) / 365.25
+    dpsi, deps = nutation.nutation(jd)
+
+    # The largest term of the series, with the argument of the Moon's node alone
+    node = nutation.fundamental_arguments(jd)[:, 4]
+    multipliers, coefficients = nutation.series()
+    principal = np.flatnonzero((multipliers == [0, 0, 0, 0, 1]).all(axis=1))[0]
+    t = (jd - ephemeris.J2000) / 36525
+    principal_psi = (coefficients[principal, 0] + t * coefficients[principal, 1]) * np.sin(node)
+
+    ax.axvspan(1727, 1747, color='#f2e6c9', alpha=0.6, linewidth=0)
+    ax.text(1737, 23, "Bradley's observations", fontsize=8, ha='center', va='top')
+    ax.plot(years, dpsi, color='#1f77b4', linewidth=0.3, label=r'$\Delta\psi$ (longitude)')
+    ax.plot(years, deps, color='#d62728', linewidth=0.3, label=r'$\Delta\epsilon$ (obliquity)')
+    ax.plot(years, principal_psi, color='black', linewidth=0.8, linestyle='--',
+            label='18.6-year term alone')
+    ax.axhline(0, color='gray', linewidth=0.5)
+    ax.set_xlim(years[0], years[-1])
+    ax.set_ylim(-24, 24)
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Nutation (arcseconds)')
+    legend = ax.legend(loc='lower right', fontsize=7, ncol=3)
+    for line in legend.get_lines():
+        line.set_linewidth(1.5)
+
+    # Over one nodal cycle the true pole circles the mean pole on an ellipse
+    # of semi-axes 9.2" (obliquity) and 6.9" (longitude times sin obliquity)
+    cycle = years < years[0] + 18.61
+    obliquity = np.radians(ephemeris.mean_obliquity(jd[cycle]))
+    x, y = dpsi[cycle] * np.sin(obliquity), deps[cycle]
+    points = np.column_stack([x, y])
+    path = LineCollection(np.stack([points[:-1], points[1:]], axis=1), cmap='viridis',
+                          linewidth=0.6)
+    path.set_array(years[cycle][:-1])
+    pole_ax.add_collection(path)
+    pole_ax.plot(0, 0, '+', color='black', markersize=10)
+    pole_ax.text(0.5, 0.5, 'Mean\npole', fontsize=7, ha='left', va='bottom')
+    colorbar = fig.colorbar(path, ax=pole_ax, fraction=0.05, pad=0.04)
+    colorbar.set_label('Year')
+    colorbar.ax.yaxis.set_major_formatter('{x:.0f}')
+    pole_ax.set_xlim(-11, 11)
+    pole_ax.set_ylim(-11, 11)
+    pole_ax.set_aspect('equal')
+    pole_ax.set_xlabel(r'$\Delta\psi \sin\epsilon$ (arcseconds)')
+    pole_ax.set_ylabel(r'$\Delta\epsilon$ (arcseconds)')
+    pole_ax.set_title('True pole about the mean pole, 1727–1745', fontsize=9)
+
+    fig.tight_layout()
+    return fig
+
+
+@figure('zenith-sector', chapter=12)
 def zenith_sector():
     """Simplified diagram of the zenith sector instrument.
 
@@ -409,9 +465,10 @@ def zenith_sector():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'zenith-sector', chapter=12)
+    return fig
 
 
+@figure('speed-of-light', chapter=12)
 def speed_of_light():
     """Visualization of how aberration gives the speed of light.
 
@@ -455,14 +512,9 @@ def speed_of_light():
     ax.set_ylim(-2, 3)
     ax.axis('off')
 
-    save_figure(fig, 'speed-of-light', chapter=12)
+    return fig
 
 
 if __name__ == "__main__":
-    aberration_geometry()
-    aberration_ellipse()
-    bradley_observations()
-    stellar_effects_comparison()
-    nutation_diagram()
-    zenith_sector()
-    speed_of_light()
+    from render import main
+    raise SystemExit(main(["--only", "ch12-*"]))
@@ -1,13 +1,16 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 13: The Airy Transit Circle."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style, table
+import datasets
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, Circle, Rectangle, FancyArrowPatch, Arc
 import numpy as np
+from tables import booktabs, escape, span
 
 
+@figure('transit-circle-schematic', chapter=13)
 def transit_circle_schematic():
     """Schematic diagram of the Airy transit circle.
 
@@ -123,9 +126,10 @@ def transit_circle_schematic():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'transit-circle-schematic', chapter=13)
+    return fig
 
 
+@figure('personal-equation', chapter=13)
 def personal_equation():
     """Diagram illustrating the personal equation concept.
 
@@ -177,9 +181,10 @@ def personal_equation():
     ax.set_ylim(-0.8, 3)
     ax.axis('off')
 
-    save_figure(fig, 'personal-equation', chapter=13)
+    return fig
 
 
+@figure('precision-evolution', chapter=13)
 def precision_evolution():
     """Chart showing the evolution of positional astronomy precision.
 
@@ -189,34 +194,25 @@ def precision_evolution():
     fig, ax = plt.subplots(figsize=(7, 4.5))
 
     # Data from table in chapter
-    instruments = [
-        ("Tycho's quadrant", 1600, 90),
-        ("Flamsteed's mural arc", 1700, 15),
-        ("Bradley's zenith sector", 1750, 2.5),
-        ("Airy's transit circle", 1850, 0.35),
-        ("Photographic astrometry", 1900, 0.1),
-        ("CCD astrometry", 2000, 0.01),
-        ("Gaia satellite", 2020, 0.00001),
-    ]
-
-    years = [i[1] for i in instruments]
-    errors = [i[2] for i in instruments]
-    names = [i[0] for i in instruments]
+    instruments = datasets.load('instrument_precision')
+    names = instruments['instrument'].tolist()
+    years = instruments['year']
+    errors = (instruments['error_min_arcsec'] + instruments['error_max_arcsec']) / 2
 
     ax.semilogy(years, errors, 'b-o', linewidth=2, markersize=8)
 
-    # Label each point
-    offsets = [(10, 1.3), (10, 1.3), (10, 1.3), (10, 1.3),
-               (-80, 1.3), (10, 0.7), (10, 1.3)]
-    for year, error, name, (xoff, yoff) in zip(years, errors, names, offsets):
+    # Label each point, nudging those that would collide with a neighbour
+    offsets = {'Photographic astrometry': (-80, 1.3), 'Modern CCD astrometry': (10, 0.7)}
+    for name, year, error in zip(names, years, errors):
+        xoff, yoff = offsets.get(name, (10, 1.3))
         ax.annotate(name, xy=(year, error), xytext=(year + xoff, error * yoff),
                     fontsize=7, ha='left' if xoff > 0 else 'right',
                     arrowprops=dict(arrowstyle='-', color='gray', lw=0.5) if xoff > 50 else None)
 
     # Highlight Airy
-    airy_idx = 3
-    ax.plot(years[airy_idx], errors[airy_idx], 'ro', markersize=12, zorder=5)
-    ax.annotate('Airy Transit Circle', xy=(years[airy_idx], errors[airy_idx]),
+    airy = names.index("Airy's transit circle")
+    ax.plot(years[airy], errors[airy], 'ro', markersize=12, zorder=5)
+    ax.annotate('Airy Transit Circle', xy=(years[airy], errors[airy]),
                 xytext=(1870, 2), fontsize=9, fontweight='bold', color='red',
                 arrowprops=dict(arrowstyle='->', color='red', lw=1.5))
 
@@ -231,9 +227,19 @@ def precision_evolution():
     ax.text(1560, 1.2, '1 arcsec', fontsize=7, color='gray')
 
     plt.tight_layout()
-    save_figure(fig, 'precision-evolution', chapter=13)
+    return fig
+
+
+@table('precision-evolution', chapter=13)
+def precision_evolution_table():
+    """Table of typical positional error by instrument (tab:precision-evolution)."""
+    rows = [[escape(instrument), span(low, high, unit="''"), f"${year}$"]
+            for instrument, year, low, high in datasets.load('instrument_precision').rows()]
+    return booktabs(['Instrument/Era', 'Typical Error (arcsec)', 'Epoch'], rows,
+                    header_style='textbf')
 
 
+@figure('prime-meridian-offset', chapter=13)
 def prime_meridian_offset():
     """Diagram showing the 102m offset between Airy and WGS84 meridians.
 
@@ -295,9 +301,10 @@ def prime_meridian_offset():
             bbox=dict(boxstyle='round,pad=0.3', facecolor='white',
                       edgecolor='#cccccc'))
 
-    save_figure(fig, 'prime-meridian-offset', chapter=13)
+    return fig
 
 
+@figure('error-budget', chapter=13)
 def error_budget():
     """Pie chart showing error sources in transit circle observations."""
     setup_style()
@@ -337,9 +344,10 @@ def error_budget():
             bbox=dict(boxstyle='round,pad=0.3', facecolor='white',
                       edgecolor='#cccccc'))
 
-    save_figure(fig, 'error-budget', chapter=13)
+    return fig
 
 
+@figure('observation-reduction', chapter=13)
 def observation_reduction():
     """Flowchart showing the data reduction process for a transit observation."""
     setup_style()
@@ -387,13 +395,9 @@ def observation_reduction():
     ax.set_ylim(-0.8, 4.8)
     ax.axis('off')
 
-    save_figure(fig, 'observation-reduction', chapter=13)
+    return fig
 
 
 if __name__ == "__main__":
-    transit_circle_schematic()
-    personal_equation()
-    precision_evolution()
-    prime_meridian_offset()
-    error_budget()
-    observation_reduction()
+    from render import main
+    raise SystemExit(main(["--only", "ch13-*"]))
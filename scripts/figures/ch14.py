@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 14: The Great Equatorial and Spectroscopy."""
 
-from common import setup_style, save_figure
+import functools
+
+from common import figure, setup_style
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import FancyBboxPatch, Circle, Wedge, Arc, FancyArrowPatch
+from matplotlib.collections import LineCollection
 import numpy as np
 
 
+@figure('chromatic-aberration', chapter=14)
 def chromatic_aberration():
     """Diagram showing chromatic aberration in a simple lens.
 
@@ -69,9 +73,10 @@ def chromatic_aberration():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'chromatic-aberration', chapter=14)
+    return fig
 
 
+@figure('achromatic-doublet', chapter=14)
 def achromatic_doublet():
     """Diagram of an achromatic doublet lens.
 
@@ -135,9 +140,10 @@ def achromatic_doublet():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'achromatic-doublet', chapter=14)
+    return fig
 
 
+@figure('equatorial-mount', chapter=14)
 def equatorial_mount():
     """Diagram of an equatorial telescope mount.
 
@@ -226,9 +232,10 @@ def equatorial_mount():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'equatorial-mount', chapter=14)
+    return fig
 
 
+@figure('spectroscope-prism', chapter=14)
 def spectroscope_prism():
     """Diagram of a prism spectroscope.
 
@@ -268,13 +275,10 @@ def spectroscope_prism():
         end_y = 0.4 + 2 * np.sin(np.radians(angle))
         ax.plot([1.3, end_x], [0.4, end_y], '-', color=color, linewidth=2)
 
-    # Spectrum band
+    # Spectrum band (violet at the bottom, red at the top)
     spectrum_x = 3.2
-    for i, (color, angle, name) in enumerate(colors):
-        y = 0.5 + i * 0.3
-        ax.fill([spectrum_x, spectrum_x + 0.3, spectrum_x + 0.3, spectrum_x],
-                [y - 0.12, y - 0.12, y + 0.12, y + 0.12],
-                color=color)
+    spectrum_strip(ax, 400, 700, extent=(spectrum_x, spectrum_x + 0.3, 0.38, 1.82),
+                   vertical=True)
 
     ax.text(spectrum_x + 0.5, 1.0, 'Spectrum', fontsize=9, ha='left')
 
@@ -287,9 +291,10 @@ def spectroscope_prism():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'spectroscope-prism', chapter=14)
+    return fig
 
 
+@figure('emission-absorption', chapter=14)
 def emission_absorption():
     """Comparison of emission and absorption spectra.
 
@@ -298,85 +303,150 @@ def emission_absorption():
     setup_style()
     fig, axes = plt.subplots(3, 1, figsize=(7, 4), height_ratios=[1, 1, 1])
 
-    wavelengths = np.linspace(400, 700, 300)
+    emission_lines = [434, 486, 518, 589, 656]  # H-gamma, H-beta, Mg, Na, H-alpha
 
     # Continuous spectrum (hot source)
     ax = axes[0]
-    for i, wl in enumerate(wavelengths):
-        color = wavelength_to_rgb(wl)
-        ax.axvline(wl, color=color, linewidth=1.2)
+    spectrum_strip(ax, 400, 700)
     ax.set_xlim(400, 700)
     ax.set_ylabel('Continuous', fontsize=9)
-    ax.text(350, 0.5, '(hot solid)', fontsize=8, ha='right', va='center',
-            transform=ax.get_yaxis_transform())
+    ax.text(1.02, 0.5, '(hot solid)', fontsize=8, ha='left', va='center',
+            transform=ax.transAxes)
     ax.set_yticks([])
 
     # Emission spectrum (hot gas)
     ax = axes[1]
-    ax.set_facecolor('black')
-    emission_lines = [434, 486, 518, 589, 656]  # H-gamma, H-beta, Mg, Na, H-alpha
-    for line in emission_lines:
-        color = wavelength_to_rgb(line)
-        ax.axvline(line, color=color, linewidth=3)
+    spectrum_strip(ax, 400, 700, lines=emission_lines, mode='emission')
     ax.set_xlim(400, 700)
     ax.set_ylabel('Emission', fontsize=9)
-    ax.text(350, 0.5, '(hot gas)', fontsize=8, ha='right', va='center',
-            transform=ax.get_yaxis_transform())
+    ax.text(1.02, 0.5, '(hot gas)', fontsize=8, ha='left', va='center',
+            transform=ax.transAxes)
     ax.set_yticks([])
 
     # Absorption spectrum (cool gas in front of hot source)
     ax = axes[2]
-    for i, wl in enumerate(wavelengths):
-        color = wavelength_to_rgb(wl)
-        ax.axvline(wl, color=color, linewidth=1.2)
     # Dark lines at same positions
-    for line in emission_lines:
-        ax.axvline(line, color='black', linewidth=3)
+    spectrum_strip(ax, 400, 700, lines=emission_lines, mode='absorption')
     ax.set_xlim(400, 700)
     ax.set_ylabel('Absorption', fontsize=9)
-    ax.text(350, 0.5, '(cool gas)', fontsize=8, ha='right', va='center',
-            transform=ax.get_yaxis_transform())
+    ax.text(1.02, 0.5, '(cool gas)', fontsize=8, ha='left', va='center',
+            transform=ax.transAxes)
     ax.set_yticks([])
     ax.set_xlabel('Wavelength (nm)', fontsize=9)
 
     plt.tight_layout()
-    save_figure(fig, 'emission-absorption', chapter=14)
-
-
-def wavelength_to_rgb(wavelength):
-    """Convert wavelength in nm to RGB color."""
-    if wavelength < 380:
-        return (0, 0, 0)
-    elif wavelength < 440:
-        r = -(wavelength - 440) / (440 - 380)
-        g = 0.0
-        b = 1.0
-    elif wavelength < 490:
-        r = 0.0
-        g = (wavelength - 440) / (490 - 440)
-        b = 1.0
-    elif wavelength < 510:
-        r = 0.0
-        g = 1.0
-        b = -(wavelength - 510) / (510 - 490)
-    elif wavelength < 580:
-        r = (wavelength - 510) / (580 - 510)
-        g = 1.0
-        b = 0.0
-    elif wavelength < 645:
-        r = 1.0
-        g = -(wavelength - 645) / (645 - 580)
-        b = 0.0
-    elif wavelength < 780:
-        r = 1.0
-        g = 0.0
-        b = 0.0
-    else:
-        return (0, 0, 0)
+    return fig
+
 
-    return (r, g, b)
+# Visible range covered by wavelength_to_rgb, in nm; anything outside is black
+VISIBLE_RANGE = (380, 780)
 
 
+@functools.lru_cache(maxsize=None)
+def _spectrum_lut(step=0.1):
+    """Tabulate the colour ramp across the visible range every step nm.
+
+    Returns:
+        (N, 3) array; row i is the colour at VISIBLE_RANGE[0] + i * step
+    """
+    # Wavelengths at which the colour ramp changes direction, and the RGB there
+    knots = [380, 440, 490, 510, 580, 645, 780]
+    ramp = np.array([(1, 0, 1), (0, 0, 1), (0, 1, 1), (0, 1, 0),
+                     (1, 1, 0), (1, 0, 0), (1, 0, 0)], dtype=float)
+
+    low, high = VISIBLE_RANGE
+    wavelengths = np.linspace(low, high, round((high - low) / step) + 1)
+    lut = np.stack([np.interp(wavelengths, knots, ramp[:, channel])
+                    for channel in range(3)], axis=-1)
+    lut.flags.writeable = False
+    return lut
+
+
+def wavelength_to_rgb(wavelength, gamma=1.0, falloff=False, step=0.1):
+    """Convert wavelengths in nm to RGB colours.
+
+    Colours are interpolated from a lookup table, so arrays of any size are
+    converted without a Python loop.
+
+    Args:
+        wavelength: wavelength in nm, or an array of them
+        gamma: exponent applied to each channel (0.8 gives the usual
+            perceptual correction; 1 leaves the ramp linear)
+        falloff: dim the colours towards both ends of the visible range,
+            where the eye is less sensitive
+        step: resolution of the lookup table in nm
+
+    Returns:
+        array of shape wavelength.shape + (3,) with channels in [0, 1];
+        black outside VISIBLE_RANGE
+    """
+    wavelength = np.asarray(wavelength, dtype=float)
+    lut = _spectrum_lut(step)
+    low, high = VISIBLE_RANGE
+
+    # Interpolating in table rows rather than nanometres keeps the grid uniform
+    position = (wavelength - low) / step
+    rows = np.arange(len(lut))
+    rgb = np.stack([np.interp(position, rows, lut[:, channel]) for channel in range(3)],
+                   axis=-1)
+
+    if falloff:
+        intensity = np.clip(np.minimum(0.3 + 0.7 * (wavelength - low) / 40,
+                                       0.3 + 0.7 * (high - wavelength) / 80), None, 1)
+        rgb = rgb * intensity[..., np.newaxis]
+    if gamma != 1:
+        rgb = rgb ** gamma
+    visible = (wavelength >= low) & (wavelength < high)
+    return np.where(visible[..., np.newaxis], rgb, 0.0)
+
+
+def spectrum_strip(ax, start, stop, samples=300, lines=(), mode='continuous',
+                   extent=None, vertical=False, linewidth=3):
+    """Draw a spectrum as a single image, with its spectral lines as one collection.
+
+    The artist count stays constant however many samples or lines there are.
+
+    Args:
+        ax: matplotlib Axes to draw on
+        start, stop: wavelength range of the strip in nm
+        samples: number of wavelength samples across the strip
+        lines: wavelengths of emission or absorption lines in nm
+        mode: 'continuous', 'emission' (coloured lines on black) or
+            'absorption' (black lines on the continuum)
+        extent: (left, right, bottom, top) of the strip in data coordinates;
+            defaults to (start, stop, 0, 1)
+        vertical: run wavelength up the y-axis instead of along the x-axis
+        linewidth: width of the spectral lines in points
+
+    Returns:
+        tuple of (AxesImage, LineCollection)
+    """
+    left, right, bottom, top = extent if extent is not None else (start, stop, 0, 1)
+
+    if mode == 'emission':
+        rgb = np.zeros((1, 1, 3))
+    else:
+        rgb = wavelength_to_rgb(np.linspace(start, stop, samples))[np.newaxis]
+    if vertical:
+        rgb = rgb.transpose(1, 0, 2)
+    image = ax.imshow(rgb, extent=(left, right, bottom, top), origin='lower',
+                      aspect=ax.get_aspect(), interpolation='bilinear')
+
+    # Map line wavelengths onto the strip's long axis
+    lines = np.asarray(lines, dtype=float)
+    low, high = (bottom, top) if vertical else (left, right)
+    position = low + (lines - start) / (stop - start) * (high - low)
+    across = np.broadcast_to((left, right) if vertical else (bottom, top), (len(lines), 2))
+    along = np.repeat(position[:, np.newaxis], 2, axis=1)
+    points = (across, along) if vertical else (along, across)
+    colors = wavelength_to_rgb(lines) if mode == 'emission' else 'black'
+    collection = LineCollection(np.stack(points, axis=-1), colors=colors,
+                                linewidths=linewidth)
+    ax.add_collection(collection, autolim=False)
+    return image, collection
+
+
+@figure('doppler-shift', chapter=14)
 def doppler_shift():
     """Diagram showing the Doppler shift of spectral lines.
 
@@ -385,48 +455,33 @@ def doppler_shift():
     setup_style()
     fig, ax = plt.subplots(figsize=(7, 4))
 
-    # Reference spectrum (at rest)
-    y_rest = 2
-    ax.axhline(y_rest, color='gray', linewidth=0.5, xmin=0.1, xmax=0.9)
+    # Each spectrum is a continuum strip with black absorption lines
+    rest_lines = np.array([450, 500, 550, 600, 656])
 
-    # Spectral lines at rest
-    rest_lines = [450, 500, 550, 600, 656]
-    for line in rest_lines:
-        ax.plot([line, line], [y_rest - 0.15, y_rest + 0.15], 'k-', linewidth=2)
+    def shifted_spectrum(y, shift):
+        spectrum_strip(ax, 430, 700, lines=rest_lines + shift, mode='absorption',
+                       extent=(430, 700, y - 0.15, y + 0.15), linewidth=2)
 
+    # Reference spectrum (at rest)
+    y_rest = 2
+    shifted_spectrum(y_rest, 0)
     ax.text(400, y_rest, 'At rest', fontsize=9, ha='center', va='center')
 
-    # Blue-shifted spectrum (approaching)
+    # Blue-shifted spectrum (approaching), with an arrow showing the shift
     y_blue = 3
     shift_blue = -15
-    ax.axhline(y_blue, color='gray', linewidth=0.5, xmin=0.1, xmax=0.9)
-
-    for line in rest_lines:
-        ax.plot([line + shift_blue, line + shift_blue],
-                [y_blue - 0.15, y_blue + 0.15], 'b-', linewidth=2)
-        # Arrow showing shift
-        if line == 550:
-            ax.annotate('', xy=(line + shift_blue, y_blue - 0.3),
-                        xytext=(line, y_rest + 0.3),
-                        arrowprops=dict(arrowstyle='->', color='blue', lw=1))
-
+    shifted_spectrum(y_blue, shift_blue)
+    ax.annotate('', xy=(550 + shift_blue, y_blue - 0.3), xytext=(550, y_rest + 0.3),
+                arrowprops=dict(arrowstyle='->', color='blue', lw=1))
     ax.text(400, y_blue, 'Approaching', fontsize=9, ha='center',
             va='center', color='blue')
 
-    # Red-shifted spectrum (receding)
+    # Red-shifted spectrum (receding), with an arrow showing the shift
     y_red = 1
     shift_red = 20
-    ax.axhline(y_red, color='gray', linewidth=0.5, xmin=0.1, xmax=0.9)
-
-    for line in rest_lines:
-        ax.plot([line + shift_red, line + shift_red],
-                [y_red - 0.15, y_red + 0.15], 'r-', linewidth=2)
-        # Arrow showing shift
-        if line == 550:
-            ax.annotate('', xy=(line + shift_red, y_red + 0.3),
-                        xytext=(line, y_rest - 0.3),
-                        arrowprops=dict(arrowstyle='->', color='red', lw=1))
-
+    shifted_spectrum(y_red, shift_red)
+    ax.annotate('', xy=(550 + shift_red, y_red + 0.3), xytext=(550, y_rest - 0.3),
+                arrowprops=dict(arrowstyle='->', color='red', lw=1))
     ax.text(400, y_red, 'Receding', fontsize=9, ha='center',
             va='center', color='red')
 
@@ -442,9 +497,10 @@ def doppler_shift():
     ax.set_ylim(-0.5, 3.8)
     ax.set_yticks([])
 
-    save_figure(fig, 'doppler-shift', chapter=14)
+    return fig
 
 
+@figure('diffraction-grating', chapter=14)
 def diffraction_grating():
     """Diagram showing diffraction grating principle.
 
@@ -509,14 +565,9 @@ def diffraction_grating():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'diffraction-grating', chapter=14)
+    return fig
 
 
 if __name__ == "__main__":
-    chromatic_aberration()
-    achromatic_doublet()
-    equatorial_mount()
-    spectroscope_prism()
-    emission_absorption()
-    doppler_shift()
-    diffraction_grating()
+    from render import main
+    raise SystemExit(main(["--only", "ch14-*"]))
@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 """Generate figures for Chapter 15: Mean Time and the Equation of Time."""
 
-from common import setup_style, save_figure
+from common import figure, setup_style
+import ephemeris
+import kepler
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from matplotlib.patches import Circle, Ellipse, FancyArrowPatch
 import numpy as np
 
 
+def solar_year():
+    """Daily solar positions through 2001, a common year, shared by the figures."""
+    return ephemeris.solar_grid('2001-01-01', '2002-01-01', '1D')
+
+
+@figure('equation-of-time', chapter=15)
 def equation_of_time_graph():
     """Graph showing the equation of time over a full year.
 
@@ -16,26 +24,12 @@ def equation_of_time_graph():
     setup_style()
     fig, ax = plt.subplots(figsize=(8, 5))
 
-    # Calculate equation of time for each day
-    days = np.arange(1, 366)
-
-    # Orbital parameters
-    e = 0.0167  # eccentricity
-    epsilon = np.radians(23.44)  # obliquity
-
-    # Mean anomaly (0 at perihelion, Jan 3)
-    M = 2 * np.pi * (days - 3) / 365.25
-
-    # Eccentricity component (in minutes)
-    E_ecc = -2 * e * np.sin(M) * (24 * 60) / (2 * np.pi)
-
-    # Obliquity component
-    # Ecliptic longitude (simplified)
-    L = 2 * np.pi * (days - 80) / 365.25  # 0 at vernal equinox (March 21)
-    E_obliq = -np.tan(epsilon/2)**2 * np.sin(2 * L) * (24 * 60) / (2 * np.pi)
-
-    # Total equation of time
-    E_total = E_ecc + E_obliq
+    # Equation of time and its two components for each day of a common year
+    sun = solar_year()
+    days = np.arange(1, len(sun.julian_date) + 1)
+    E_ecc = sun.eccentricity_term
+    E_obliq = sun.obliquity_term
+    E_total = sun.equation_of_time
 
     # Plot
     ax.plot(days, E_ecc, 'b--', linewidth=1.5, alpha=0.7, label='Eccentricity effect')
@@ -54,10 +48,10 @@ def equation_of_time_graph():
 
     # Mark extrema
     extrema = [
-        (45, '+14.3 min', 'Feb 11'),
-        (135, '-3.7 min', 'May 14'),
-        (210, '+6.4 min', 'Jul 26'),
-        (307, '-16.3 min', 'Nov 3'),
+        (42, '-14.2 min', 'Feb 11'),
+        (134, '+3.7 min', 'May 14'),
+        (207, '-6.5 min', 'Jul 26'),
+        (307, '+16.4 min', 'Nov 3'),
     ]
 
     for day, value, date in extrema:
@@ -75,9 +69,10 @@ def equation_of_time_graph():
     ax.grid(True, alpha=0.3)
 
     plt.tight_layout()
-    save_figure(fig, 'equation-of-time', chapter=15)
+    return fig
 
 
+@figure('analemma', chapter=15)
 def analemma():
     """The analemma - figure-8 pattern traced by the Sun.
 
@@ -86,25 +81,10 @@ def analemma():
     setup_style()
     fig, ax = plt.subplots(figsize=(5, 7))
 
-    # Calculate analemma points
-    days = np.arange(1, 366)
-
-    # Orbital parameters
-    e = 0.0167
-    epsilon = np.radians(23.44)
-
-    # Mean anomaly
-    M = 2 * np.pi * (days - 3) / 365.25
-
-    # Equation of time (x-axis, in degrees)
-    L = 2 * np.pi * (days - 80) / 365.25
-    E_ecc = -2 * e * np.sin(M)
-    E_obliq = -np.tan(epsilon/2)**2 * np.sin(2 * L)
-    E_total = (E_ecc + E_obliq) * (180 / np.pi)  # convert to degrees
-    x = E_total * 4  # 4 minutes per degree of rotation
-
-    # Declination (y-axis)
-    decl = np.degrees(np.arcsin(np.sin(epsilon) * np.sin(L)))
+    # Equation of time (x-axis, in minutes) and declination (y-axis)
+    sun = solar_year()
+    x = sun.equation_of_time
+    decl = sun.declination
 
     # Plot the analemma
     ax.plot(x, decl, 'b-', linewidth=2)
@@ -112,10 +92,10 @@ def analemma():
     # Mark solstices and equinoxes
     special_days = [
         (1, 'Jan 1', 'left'),
-        (80, 'Mar 20', 'right'),
+        (79, 'Mar 20', 'right'),
         (172, 'Jun 21', 'left'),
         (265, 'Sep 22', 'right'),
-        (356, 'Dec 21', 'right'),
+        (355, 'Dec 21', 'right'),
     ]
 
     for day, label, ha in special_days:
@@ -145,9 +125,10 @@ def analemma():
     ax.set_aspect('equal')
 
     plt.tight_layout()
-    save_figure(fig, 'analemma', chapter=15)
+    return fig
 
 
+@figure('eccentricity-effect', chapter=15)
 def eccentricity_effect():
     """Diagram showing how Earth's elliptical orbit causes the eccentricity effect.
 
@@ -156,65 +137,86 @@ def eccentricity_effect():
     setup_style()
     fig, ax = plt.subplots(figsize=(7, 5))
 
-    # Earth's orbit (ellipse)
+    # Earth's orbit (ellipse), parametrized by eccentric anomaly with the Sun
+    # at the focus
     a = 2.5  # semi-major axis (scaled)
     e = 0.4  # exaggerated eccentricity for visibility
     b = a * np.sqrt(1 - e**2)
 
     theta = np.linspace(0, 2*np.pi, 100)
-    x_orbit = a * np.cos(theta) - a * e
+    x_orbit = a * (np.cos(theta) - e)
     y_orbit = b * np.sin(theta)
 
     ax.plot(x_orbit, y_orbit, 'b-', linewidth=1.5)
 
+    # Positions at equal intervals of time (monthly), from Kepler's equation
+    mean_anomaly = np.linspace(0, 2*np.pi, 12, endpoint=False)
+    E = kepler.solve(mean_anomaly, e)
+    ax.plot(a * (np.cos(E) - e), b * np.sin(E), 'o', color='gray', markersize=3)
+    ax.text(-a * e, -b - 0.3, 'Dots: equal intervals of time', fontsize=7,
+            ha='center', color='gray')
+
+    # Dates of perihelion and aphelion, from the real orbit, to the hour
+    sun_year = ephemeris.solar_grid('2001-01-01', '2002-01-01', '1h')
+    start = np.datetime64('2001-01-01T00', 'h')
+    perihelion_date, aphelion_date = (
+        (start + int(index)).astype(object)
+        for index in (sun_year.distance.argmin(), sun_year.distance.argmax()))
+
     # Sun at focus
     sun = Circle((0, 0), 0.2, facecolor='#FFD700', edgecolor='black', linewidth=1.5)
     ax.add_patch(sun)
     ax.text(0, -0.45, 'Sun', fontsize=9, ha='center')
 
     # Earth at perihelion (closest)
-    perihelion_x = a * (1 - e) - a * e
+    perihelion_x = a * (1 - e)
     earth_p = Circle((perihelion_x, 0), 0.12, facecolor='#1f77b4', edgecolor='black')
     ax.add_patch(earth_p)
-    ax.text(perihelion_x, 0.3, 'Perihelion\n(Jan 3)', fontsize=8, ha='center')
+    ax.text(perihelion_x + 0.2, -0.45,
+            f'Perihelion\n({perihelion_date:%b} {perihelion_date.day})',
+            fontsize=8, ha='left')
 
     # Velocity arrow at perihelion (large)
     ax.annotate('', xy=(perihelion_x, 0.7), xytext=(perihelion_x, 0.15),
                 arrowprops=dict(arrowstyle='->', color='red', lw=2))
-    ax.text(perihelion_x + 0.3, 0.5, 'Fast', fontsize=8, color='red')
+    ax.text(perihelion_x + 0.15, 0.5, 'Fast', fontsize=8, color='red')
 
     # Earth at aphelion (farthest)
-    aphelion_x = -a * (1 + e) - a * e
+    aphelion_x = -a * (1 + e)
     earth_a = Circle((aphelion_x, 0), 0.12, facecolor='#1f77b4', edgecolor='black')
     ax.add_patch(earth_a)
-    ax.text(aphelion_x, 0.3, 'Aphelion\n(Jul 4)', fontsize=8, ha='center')
+    ax.text(aphelion_x - 0.2, -0.45,
+            f'Aphelion\n({aphelion_date:%b} {aphelion_date.day})',
+            fontsize=8, ha='right')
 
     # Velocity arrow at aphelion (small)
     ax.annotate('', xy=(aphelion_x, 0.4), xytext=(aphelion_x, 0.15),
                 arrowprops=dict(arrowstyle='->', color='blue', lw=2))
-    ax.text(aphelion_x - 0.3, 0.35, 'Slow', fontsize=8, ha='right', color='blue')
+    ax.text(aphelion_x - 0.15, 0.35, 'Slow', fontsize=8, ha='right', color='blue')
 
-    # Semi-major axis annotation
-    ax.plot([0, a - a*e], [0.8, 0.8], 'k-', linewidth=1)
-    ax.plot([0, 0], [0.75, 0.85], 'k-', linewidth=1)
-    ax.plot([a - a*e, a - a*e], [0.75, 0.85], 'k-', linewidth=1)
-    ax.text((a - a*e)/2, 0.95, 'a', fontsize=10, ha='center')
+    # Semi-major axis annotation, from the centre to perihelion
+    bar_y = b + 0.25
+    ax.plot([-a*e, a - a*e], [bar_y, bar_y], 'k-', linewidth=1)
+    ax.plot([-a*e, -a*e], [bar_y - 0.05, bar_y + 0.05], 'k-', linewidth=1)
+    ax.plot([a - a*e, a - a*e], [bar_y - 0.05, bar_y + 0.05], 'k-', linewidth=1)
+    ax.text(a/2 - a*e, bar_y + 0.15, 'a', fontsize=10, ha='center')
 
     # Note about effect
-    ax.text(0, -2.2, 'Earth moves faster at perihelion,\nslower at aphelion\n' +
+    ax.text(-a * e, -b - 1.2, 'Earth moves faster at perihelion,\nslower at aphelion\n' +
             r'($v^2 = GM(2/r - 1/a)$)',
             fontsize=9, ha='center',
             bbox=dict(boxstyle='round,pad=0.3', facecolor='white',
                       edgecolor='#cccccc'))
 
-    ax.set_xlim(-6, 3)
-    ax.set_ylim(-2.8, 1.8)
+    ax.set_xlim(-5.2, 3.2)
+    ax.set_ylim(-b - 1.5, b + 0.7)
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'eccentricity-effect', chapter=15)
+    return fig
 
 
+@figure('obliquity-effect', chapter=15)
 def obliquity_effect():
     """Diagram showing how the obliquity of the ecliptic affects the equation of time.
 
@@ -293,9 +295,10 @@ def obliquity_effect():
     ax.set_aspect('equal')
     ax.axis('off')
 
-    save_figure(fig, 'obliquity-effect', chapter=15)
+    return fig
 
 
+@figure('mean-vs-apparent', chapter=15)
 def mean_vs_apparent():
     """Diagram comparing mean solar time to apparent solar time."""
     setup_style()
@@ -312,11 +315,14 @@ def mean_vs_apparent():
             color='blue')
 
     # Apparent solar day (varies)
-    # On a day when Sun is 10 minutes slow
+    # On the day the Sun is slowest, in mid-February
+    sun = solar_year()
+    slowest = sun.equation_of_time.argmin()
+    date = (np.datetime64('2001-01-01') + int(slowest)).astype(object)
+    offset = -sun.equation_of_time[slowest] / 60  # hours
     ax.axhline(1, color='red', linewidth=2)
     for h in hours:
         # Offset by equation of time
-        offset = 10/60  # 10 minutes
         ax.plot(h + offset, 1, '|', color='red', markersize=10, markeredgewidth=2)
     ax.text(-1, 1, 'Apparent solar\ntime (sundial)', fontsize=9, ha='right',
             va='center', color='red')
@@ -324,12 +330,14 @@ def mean_vs_apparent():
     # Highlight noon
     ax.axvline(12, color='gray', linestyle='--', linewidth=1, alpha=0.5)
     ax.text(12, 2.5, 'Noon (clock)', fontsize=8, ha='center', color='blue')
-    ax.text(12 + 10/60, 0.5, 'Noon (Sun)', fontsize=8, ha='center', color='red')
+    ax.text(12 + offset, 0.5, 'Noon (Sun)', fontsize=8, ha='center', color='red')
 
     # Difference arrow
-    ax.annotate('', xy=(12 + 10/60, 0.7), xytext=(12, 0.7),
+    ax.annotate('', xy=(12 + offset, 0.7), xytext=(12, 0.7),
                 arrowprops=dict(arrowstyle='<->', color='green', lw=2))
-    ax.text(12 + 5/60, 0.3, 'Equation\nof time', fontsize=8, ha='center', color='green')
+    ax.text(12 + offset/2, 0.1,
+            f'Equation of time\n({date:%b} {date.day}: {offset * 60:.1f} min)',
+            fontsize=8, ha='center', color='green')
 
     ax.set_xlim(-2, 25)
     ax.set_ylim(-0.5, 3)
@@ -338,12 +346,9 @@ def mean_vs_apparent():
     ax.set_xlabel('Hour', fontsize=10)
     ax.set_yticks([])
 
-    save_figure(fig, 'mean-vs-apparent', chapter=15)
+    return fig
 
 
 if __name__ == "__main__":
-    equation_of_time_graph()
-    analemma()
-    eccentricity_effect()
-    obliquity_effect()
-    mean_vs_apparent()
+    from render import main
+    raise SystemExit(main(["--only", "ch15-*"]))
@@ -1,12 +1,155 @@
 """Shared utilities for matplotlib figure generation."""
 
+import ast
+import functools
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import os
+import platform
+import sys
 from pathlib import Path
+from typing import Callable, NamedTuple
+
+# Keep matplotlib's caches, including the TeX text cache, inside the project so
+# they persist across builds and are shared by every render worker. This must
+# happen before matplotlib is first imported, so import common first.
+os.environ.setdefault('MPLCONFIGDIR', str(Path(__file__).resolve().parent.parent.parent
+                                          / "build" / "matplotlib"))
+import datasets
 import matplotlib.pyplot as plt
 import scienceplots
 
 # Paths
+SCRIPT_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = Path(__file__).parent.parent.parent
-OUTPUT_DIR = PROJECT_ROOT / "src" / "figures" / "generated"
+
+# Rendering profiles, selected with the FIGURE_PROFILE environment variable or
+# render.py --draft. 'release' produces the book's figures; 'draft' renders
+# quickly for watch mode (low DPI, mathtext instead of usetex, no tight-bbox
+# pass) into a separate directory that LaTeX prefers when \figuredraft is defined.
+PROFILES = {
+    'release': {
+        'output_dir': PROJECT_ROOT / "src" / "figures" / "generated",
+        'rcparams': {},
+        'savefig': {'bbox_inches': 'tight', 'dpi': 300},
+    },
+    'draft': {
+        'output_dir': PROJECT_ROOT / "src" / "figures" / "draft" / "generated",
+        'rcparams': {'figure.dpi': 100, 'text.usetex': False, 'mathtext.fontset': 'cm'},
+        'savefig': {'dpi': 100},
+    },
+}
+# PROFILE, OUTPUT_DIR, MANIFEST_PATH, DEPS_DIR and SAVE_KWARGS are set by the
+# use_profile() call at the end of this module
+
+# Bump to invalidate every cached figure when the caching scheme changes
+CACHE_VERSION = 3
+
+# rcParams that describe the session rather than the rendered image
+_SESSION_RCPARAMS = {'backend', 'backend_fallback', 'interactive'}
+
+
+class Figure(NamedTuple):
+    """A registered figure function and the file it renders to."""
+
+    name: str
+    chapter: int
+    func: Callable
+
+    @property
+    def id(self) -> str:
+        """Identifier used on the command line and in the manifest, e.g. 'ch15-analemma'."""
+        return f"ch{self.chapter:02d}-{self.name}"
+
+    @property
+    def path(self) -> Path:
+        """Location of the rendered PNG."""
+        return OUTPUT_DIR / f"{self.id}.png"
+
+
+# Registry of every figure, keyed by Figure.id; filled by the @figure decorator
+FIGURES = {}
+
+
+def figure(name: str, chapter: int):
+    """Register a function that draws a figure and returns it.
+
+    Args:
+        name: descriptive name (e.g., 'longitude-error')
+        chapter: chapter number (1-25)
+    """
+    def register(func):
+        spec = Figure(name, chapter, func)
+        existing = FIGURES.get(spec.id)
+        # A chapter run as a script is registered again when the driver imports it
+        if existing is not None and existing.func.__qualname__ != func.__qualname__:
+            raise ValueError(f"figure {spec.id} is registered by both "
+                             f"{existing.func.__qualname__} and {func.__qualname__}")
+        FIGURES[spec.id] = spec
+        return func
+    return register
+
+
+# Generated LaTeX table fragments, shared by every profile
+TABLE_DIR = PROJECT_ROOT / "src" / "tables" / "generated"
+
+
+class Table(NamedTuple):
+    """A registered function that renders a LaTeX table fragment, and its file."""
+
+    name: str
+    chapter: int
+    func: Callable
+
+    @property
+    def id(self) -> str:
+        """Identifier used on the command line, e.g. 'ch01-dead-reckoning-error'."""
+        return f"ch{self.chapter:02d}-{self.name}"
+
+    @property
+    def path(self) -> Path:
+        """Location of the generated fragment, which the chapter inputs."""
+        return TABLE_DIR / f"{self.id}.tex"
+
+
+# Registry of every table, keyed by Table.id; filled by the @table decorator
+TABLES = {}
+
+
+def table(name: str, chapter: int):
+    """Register a function that returns the body of a LaTeX table (see tables.py).
+
+    Args:
+        name: descriptive name, usually the table's label without 'tab:'
+        chapter: chapter number (1-25)
+    """
+    def register(func):
+        spec = Table(name, chapter, func)
+        existing = TABLES.get(spec.id)
+        if existing is not None and existing.func.__qualname__ != func.__qualname__:
+            raise ValueError(f"table {spec.id} is registered by both "
+                             f"{existing.func.__qualname__} and {func.__qualname__}")
+        TABLES[spec.id] = spec
+        return func
+    return register
+
+
+def use_profile(name: str):
+    """Select the rendering profile for this process and the workers it starts.
+
+    Sets PROFILE, OUTPUT_DIR, MANIFEST_PATH, DEPS_DIR and SAVE_KWARGS.
+    """
+    global PROFILE, OUTPUT_DIR, MANIFEST_PATH, DEPS_DIR, SAVE_KWARGS
+    if name not in PROFILES:
+        raise ValueError(f"unknown figure profile {name!r}; expected one of {', '.join(PROFILES)}")
+    os.environ['FIGURE_PROFILE'] = PROFILE = name
+    OUTPUT_DIR = PROFILES[name]['output_dir']
+    MANIFEST_PATH = OUTPUT_DIR / ".manifest.json"
+    DEPS_DIR = OUTPUT_DIR / ".deps"
+    SAVE_KWARGS = PROFILES[name]['savefig']
+    style_snapshot.cache_clear()
 
 
 def setup_style():
@@ -30,6 +173,7 @@ def setup_style():
         'grid.linewidth': 0.5,
         'grid.alpha': 0.3,
     })
+    plt.rcParams.update(PROFILES[PROFILE]['rcparams'])
 
 
 def save_figure(fig, name: str, chapter: int):
@@ -42,6 +186,289 @@ def save_figure(fig, name: str, chapter: int):
     """
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     filename = f"ch{chapter:02d}-{name}.png"
-    fig.savefig(OUTPUT_DIR / filename, bbox_inches='tight', dpi=300)
+    fig.savefig(OUTPUT_DIR / filename, **SAVE_KWARGS)
     plt.close(fig)
     print(f"Generated: {filename}")
+
+
+@functools.lru_cache(maxsize=None)
+def style_snapshot() -> str:
+    """Return the rcParams produced by setup_style() as a stable string."""
+    with plt.rc_context():
+        setup_style()
+        params = {key: repr(value) for key, value in sorted(plt.rcParams.items())
+                  if key not in _SESSION_RCPARAMS}
+    return json.dumps(params, sort_keys=True)
+
+
+def uses_tex() -> bool:
+    """Whether the current profile typesets text with LaTeX."""
+    with plt.rc_context():
+        setup_style()
+        return plt.rcParams['text.usetex']
+
+
+@functools.lru_cache(maxsize=None)
+def library_versions() -> str:
+    """Return the versions of every library that affects rendered output."""
+    versions = {'python': platform.python_version()}
+    for dist in ('matplotlib', 'numpy', 'SciencePlots', 'pillow'):
+        try:
+            versions[dist] = importlib.metadata.version(dist)
+        except importlib.metadata.PackageNotFoundError:
+            versions[dist] = None
+    return json.dumps(versions, sort_keys=True)
+
+
+@functools.lru_cache(maxsize=None)
+def _in_project(filename) -> bool:
+    return filename is not None and Path(filename).resolve().is_relative_to(SCRIPT_DIR)
+
+
+class Constant(NamedTuple):
+    """A module-level variable of a project module, such as ch14.VISIBLE_RANGE."""
+
+    module: str
+    name: str
+
+    @property
+    def source(self) -> str:
+        """The top-level statements that assign the variable."""
+        return _assignments(self.module)[self.name]
+
+
+@functools.lru_cache(maxsize=None)
+def _assignments(module_name) -> dict:
+    """Return the source of the top-level assignments in a module, by assigned name."""
+    text = inspect.getsource(sys.modules[module_name])
+    found = {}
+    for node in ast.parse(text).body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, (ast.AnnAssign, ast.AugAssign)):
+            targets = [node.target]
+        else:
+            continue
+        segment = ast.get_source_segment(text, node) + "\n"
+        for target in targets:
+            for name in ast.walk(target):
+                if isinstance(name, ast.Name):
+                    found[name.id] = found.get(name.id, '') + segment
+    return found
+
+
+def _project_object(obj):
+    """Return obj, unwrapped, if it is a function or class defined in scripts/figures, else None."""
+    if inspect.isclass(obj):
+        module = sys.modules.get(obj.__module__)
+        return obj if _in_project(getattr(module, '__file__', None)) else None
+    if not callable(obj):
+        return None
+    obj = inspect.unwrap(obj)
+    if inspect.isfunction(obj) and _in_project(obj.__code__.co_filename):
+        return obj
+    return None
+
+
+def _code_objects(obj):
+    """Return the code a dependency runs and the namespace its global names resolve in.
+
+    A class contributes the code of its methods, including static and class
+    methods and properties; a Constant the code of its assignments.
+
+    Returns:
+        tuple of (list of code objects, module globals)
+    """
+    if isinstance(obj, Constant):
+        module = sys.modules[obj.module]
+        return [compile(obj.source, module.__file__, 'exec')], vars(module)
+    if inspect.isclass(obj):
+        functions = []
+        for member in vars(obj).values():
+            if isinstance(member, (staticmethod, classmethod)):
+                member = member.__func__
+            if isinstance(member, property):
+                functions += [f for f in (member.fget, member.fset, member.fdel) if f is not None]
+            elif inspect.isfunction(member):
+                functions.append(member)
+        codes = [f.__code__ for f in functions if _in_project(f.__code__.co_filename)]
+        return codes, vars(sys.modules[obj.__module__])
+    return [obj.__code__], obj.__globals__
+
+
+def function_id(obj) -> str:
+    """Return a dependency's qualified name, e.g. 'ch14.wavelength_to_rgb' or 'ch14.VISIBLE_RANGE'."""
+    if isinstance(obj, Constant):
+        return f"{obj.module}.{obj.name}"
+    return f"{obj.__module__}.{obj.__qualname__}"
+
+
+def dependencies(func) -> list:
+    """Return every project function, class and module-level constant that func uses.
+
+    Names are resolved through each function's globals, including attribute
+    access on imported project modules (e.g. ``ephemeris.solar_position`` or
+    ``ephemeris.ABERRATION_CONSTANT``). A class is followed into its methods
+    and project base classes, and a constant into the names its assignment
+    uses. The result includes func itself and is sorted by function_id().
+    """
+    found = {function_id(func): func}
+    pending = [func]
+    while pending:
+        current = pending.pop()
+        code_objects, namespace = _code_objects(current)
+        candidates = []
+        if inspect.isclass(current):
+            candidates += filter(None, map(_project_object, current.__bases__))
+        while code_objects:
+            code = code_objects.pop()
+            code_objects.extend(const for const in code.co_consts if inspect.iscode(const))
+            namespaces = [namespace]
+            namespaces += [vars(obj) for obj in map(namespace.get, code.co_names)
+                           if inspect.ismodule(obj) and _in_project(getattr(obj, '__file__', None))]
+            for names in namespaces:
+                assigned = _assignments(names['__name__'])
+                for name in code.co_names:
+                    if name not in names:
+                        continue
+                    obj = _project_object(names[name])
+                    if obj is not None:
+                        candidates.append(obj)
+                    elif name in assigned and not inspect.ismodule(names[name]):
+                        candidates.append(Constant(names['__name__'], name))
+        for obj in candidates:
+            if function_id(obj) not in found:
+                found[function_id(obj)] = obj
+                pending.append(obj)
+    return [found[key] for key in sorted(found)]
+
+
+def data_dependencies(func) -> list:
+    """Return the names of every dataset that func, or a dependency of it, loads.
+
+    A dataset counts as used when its name appears as a string constant in
+    one of those functions, methods or assignments, as in
+    ``datasets.load('chronometer_trials')``.
+    """
+    names = set(datasets.available())
+    found = set()
+    for dependency in dependencies(func):
+        code_objects, _ = _code_objects(dependency)
+        while code_objects:
+            code = code_objects.pop()
+            for const in code.co_consts:
+                if inspect.iscode(const):
+                    code_objects.append(const)
+                elif isinstance(const, str) and const in names:
+                    found.add(const)
+    return sorted(found)
+
+
+def data_fingerprint(name: str) -> str:
+    """Hash the CSV source of a dataset."""
+    return hashlib.sha256(datasets.source_path(name).read_bytes()).hexdigest()
+
+
+def function_fingerprint(obj) -> str:
+    """Hash the source of a single dependency: a function, a class or a Constant."""
+    source = obj.source if isinstance(obj, Constant) else inspect.getsource(obj)
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def environment_fingerprint() -> str:
+    """Hash the rendering environment shared by every figure."""
+    digest = hashlib.sha256()
+    for part in (str(CACHE_VERSION), style_snapshot(), library_versions(),
+                 json.dumps(SAVE_KWARGS, sort_keys=True)):
+        digest.update(part.encode())
+    return digest.hexdigest()
+
+
+def figure_key(func) -> str:
+    """Hash everything that affects the images a figure function produces.
+
+    The key covers the source of every project function, class and
+    module-level constant it depends on, the datasets they load, the
+    rcParams set by setup_style(), the savefig arguments and the library
+    versions.
+    """
+    digest = hashlib.sha256(environment_fingerprint().encode())
+    for dependency in dependencies(func):
+        digest.update(function_id(dependency).encode())
+        digest.update(function_fingerprint(dependency).encode())
+    for name in data_dependencies(func):
+        digest.update(f"dataset:{name}".encode())
+        digest.update(data_fingerprint(name).encode())
+    return digest.hexdigest()
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    """Write text to path unless it already holds exactly that text.
+
+    Leaving unchanged files alone keeps their modification times, so Make
+    and latexmk only see real changes.
+
+    Returns:
+        True if the file was written
+    """
+    try:
+        if path.read_text() == text:
+            return False
+    except FileNotFoundError:
+        path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return True
+
+
+def load_manifest() -> dict:
+    """Load the figure cache manifest, or an empty one if there is none."""
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_manifest(manifest: dict):
+    """Write the figure cache manifest next to the generated figures."""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+
+def is_current(spec: Figure, manifest: dict) -> bool:
+    """Check whether a figure's cached image is present and up to date."""
+    entry = manifest.get(spec.id)
+    return entry is not None and entry['key'] == figure_key(spec.func) and spec.path.exists()
+
+
+def profiling_dir():
+    """Return where render() writes profiles, or None if profiling is off.
+
+    Profiling is turned on by setting FIGURE_PROFILING to 1 (for build/profile)
+    or to a directory.
+    """
+    value = os.environ.get('FIGURE_PROFILING')
+    if not value or value == '0':
+        return None
+    return PROJECT_ROOT / "build" / "profile" if value == '1' else Path(value)
+
+
+def render(spec: Figure) -> dict:
+    """Draw and save a registered figure, returning its manifest entry.
+
+    With FIGURE_PROFILING set, the render runs under cProfile and
+    tracemalloc (see profiling.py).
+    """
+    directory = profiling_dir()
+    if directory is None:
+        fig = spec.func()
+        save_figure(fig, spec.name, spec.chapter)
+    else:
+        import profiling
+        with profiling.profiled(spec.id, directory) as timer:
+            with timer.timing('build'):
+                fig = spec.func()
+            save_figure(fig, spec.name, spec.chapter)
+    return {'key': figure_key(spec.func)}
+
+
+use_profile(os.environ.get('FIGURE_PROFILE', 'release'))
@@ -0,0 +1,203 @@
+"""Typed columnar datasets for the figures, loaded through memory maps.
+
+Each dataset is a CSV file in this directory whose header names and types
+its columns, e.g. ``year:int,error_arcsec:float,instrument:str``. Lines
+starting with '#' are comments, for sources and notes. On first use a
+dataset is compiled to one .npy file per column under build/datasets/, and
+later loads map those files read-only with np.load(mmap_mode='r'). Nothing
+is parsed or copied until a column is read, so chapter scripts can import
+this package for free and catalogs of tens of thousands of rows load as
+fast as a handful.
+
+A compiled dataset records the SHA-256 of its CSV and is rebuilt when the
+CSV changes. The figure cache (common.figure_key) hashes the CSV of every
+dataset a figure names, so a figure must pass the dataset name to load()
+as a string literal.
+
+Example:
+    catalogs = datasets.load('catalog_precision')
+    early = catalogs.filter(catalogs['year'] < 1600).select('catalog', 'error_arcsec')
+"""
+
+import csv
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+SOURCE_DIR = Path(__file__).resolve().parent
+BUILD_DIR = SOURCE_DIR.parent.parent.parent / "build" / "datasets"
+
+# Column types allowed in a CSV header, and how each is stored
+DTYPES = {'str': np.str_, 'int': np.int64, 'float': np.float64, 'bool': np.bool_}
+
+# Bump to recompile every dataset when the compiled layout changes
+FORMAT_VERSION = 1
+
+
+class Table:
+    """Named columns of equal length, typically read-only memory maps.
+
+    Args:
+        columns: dict of column name to 1-D array, in column order
+    """
+
+    def __init__(self, columns):
+        self._columns = dict(columns)
+        lengths = {len(column) for column in self._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"columns have different lengths: {sorted(lengths)}")
+
+    @property
+    def columns(self):
+        """Column names, in order."""
+        return list(self._columns)
+
+    def __len__(self):
+        return len(next(iter(self._columns.values()), ()))
+
+    def __getitem__(self, name):
+        try:
+            return self._columns[name]
+        except KeyError:
+            raise KeyError(f"no column {name!r}; columns are {', '.join(self._columns)}") from None
+
+    def __repr__(self):
+        return f"Table({len(self)} rows; {', '.join(self._columns)})"
+
+    def select(self, *names):
+        """Return a table with only the named columns, in that order, sharing their data."""
+        return Table({name: self[name] for name in names})
+
+    def filter(self, mask=None, **conditions):
+        """Return the rows where mask is true and every condition holds.
+
+        Args:
+            mask: optional boolean array, one entry per row
+            **conditions: column=value keeps rows equal to value;
+                column=[values] keeps rows equal to any of them
+
+        Example:
+            trials.filter(trials['error_s'] < 60, watch=['H4', 'H5'])
+        """
+        keep = np.ones(len(self), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        for name, value in conditions.items():
+            column = self[name]
+            if isinstance(value, (list, tuple, set, np.ndarray)):
+                keep = keep & np.isin(column, list(value))
+            else:
+                keep = keep & (column == value)
+        return Table({name: column[keep] for name, column in self._columns.items()})
+
+    def rows(self):
+        """Return the rows as tuples of Python values, in column order."""
+        return list(zip(*(column.tolist() for column in self._columns.values())))
+
+
+def available():
+    """Return the names of every dataset, sorted."""
+    return sorted(path.stem for path in SOURCE_DIR.glob('*.csv'))
+
+
+def source_path(name):
+    """Return the CSV a dataset is compiled from.
+
+    Raises:
+        ValueError: if there is no such dataset
+    """
+    path = SOURCE_DIR / f"{name}.csv"
+    if not path.is_file():
+        raise ValueError(f"unknown dataset {name!r}; expected one of {', '.join(available())}")
+    return path
+
+
+def parse(text):
+    """Parse a typed CSV into a dict of column name to array.
+
+    Raises:
+        ValueError: if a header cell has no known type or a row has the wrong length
+    """
+    lines = [line for line in text.splitlines() if line.strip() and not line.startswith('#')]
+    reader = csv.reader(lines)
+    header = next(reader)
+    names, types = [], []
+    for cell in header:
+        name, _, kind = cell.strip().partition(':')
+        if kind not in DTYPES:
+            raise ValueError(f"column {name!r} has type {kind!r}; expected one of {', '.join(DTYPES)}")
+        names.append(name)
+        types.append(kind)
+
+    cells = [[] for _ in names]
+    for number, row in enumerate(reader, start=2):
+        if len(row) != len(names):
+            raise ValueError(f"row {number} has {len(row)} fields; expected {len(names)}")
+        for values, cell in zip(cells, row):
+            values.append(cell.strip())
+
+    columns = {}
+    for name, kind, values in zip(names, types, cells):
+        if kind == 'bool':
+            columns[name] = np.array([value.lower() in ('1', 'true', 'yes') for value in values])
+        elif kind == 'float':
+            columns[name] = np.array([float(value) if value else np.nan for value in values])
+        else:
+            columns[name] = np.array(values, dtype=DTYPES[kind])
+    return columns
+
+
+def _digest(data):
+    return hashlib.sha256(data + f"v{FORMAT_VERSION}".encode()).hexdigest()
+
+
+def compile_dataset(name, force=False):
+    """Compile a dataset's CSV to one .npy file per column, unless it is current.
+
+    Files are written under temporary names and renamed into place, with
+    the metadata last, so render workers compiling the same dataset at
+    once never see a partial result.
+
+    Returns:
+        the directory holding the compiled dataset
+    """
+    data = source_path(name).read_bytes()
+    digest = _digest(data)
+    directory = BUILD_DIR / name
+    meta_path = directory / "meta.json"
+    if not force:
+        try:
+            if json.loads(meta_path.read_text())['sha256'] == digest:
+                return directory
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+
+    columns = parse(data.decode())
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = f".{os.getpid()}.tmp"
+    for index, array in enumerate(columns.values()):
+        temporary = directory / f"{index}.npy{suffix}"
+        with open(temporary, 'wb') as file:
+            np.save(file, array)
+        os.replace(temporary, directory / f"{index}.npy")
+    meta = {'sha256': digest, 'columns': list(columns),
+            'rows': len(next(iter(columns.values()), ()))}
+    temporary = meta_path.with_name(meta_path.name + suffix)
+    temporary.write_text(json.dumps(meta, indent=2) + "\n")
+    os.replace(temporary, meta_path)
+    return directory
+
+
+@functools.lru_cache(maxsize=None)
+def load(name):
+    """Load a dataset as a Table of read-only memory-mapped columns, compiling it if needed.
+
+    Args:
+        name: dataset name, the CSV's stem (e.g. 'chronometer_trials')
+    """
+    directory = compile_dataset(name)
+    meta = json.loads((directory / "meta.json").read_text())
+    return Table({column: np.load(directory / f"{index}.npy", mmap_mode='r')
+                  for index, column in enumerate(meta['columns'])})
@@ -0,0 +1,167 @@
+"""Low-precision solar ephemeris for the Chapter 15 figures, over arrays.
+
+Positions follow the Astronomical Almanac's low-precision formulae for the
+Sun (mean longitude, mean anomaly and a slowly varying eccentricity and
+obliquity), except that the true anomaly comes from solving Kepler's
+equation rather than from a truncated equation of the centre. They are good
+to a few seconds of time in the equation of time for several centuries
+either side of 2000.
+
+Times may be numpy datetime64 values or Julian dates, in arrays of any shape.
+solar_grid() memoizes whole grids, so figures that plot the same year share
+one computation.
+"""
+
+import functools
+from typing import NamedTuple
+
+import kepler
+import numpy as np
+
+# Julian date of the J2000.0 epoch, 2000 January 1.5
+J2000 = 2451545.0
+
+# Minutes of time per degree of hour angle
+MINUTES_PER_DEGREE = 4.0
+
+# Constant of aberration, the Earth's mean orbital speed over c, in arcseconds
+ABERRATION_CONSTANT = 20.49552
+
+
+class SolarPosition(NamedTuple):
+    """Apparent place of the Sun, each field an array shaped like the times.
+
+    Angles are in degrees and the equation of time and its parts in minutes
+    of time, positive when the Sun is ahead of the clock (apparent minus mean
+    solar time).
+    """
+
+    julian_date: np.ndarray
+    mean_anomaly: np.ndarray
+    longitude: np.ndarray
+    right_ascension: np.ndarray
+    declination: np.ndarray
+    distance: np.ndarray
+    equation_of_time: np.ndarray
+    eccentricity_term: np.ndarray
+    obliquity_term: np.ndarray
+
+
+def julian_date(times):
+    """Convert datetime64 values to Julian dates; numbers are taken as Julian dates."""
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        seconds = (times - np.datetime64('2000-01-01T12:00:00')) / np.timedelta64(1, 's')
+        return J2000 + seconds / 86400
+    return times.astype(float)
+
+
+def _centuries(jd):
+    """Julian centuries from J2000.0."""
+    return (jd - J2000) / 36525
+
+
+def eccentricity(jd):
+    """Eccentricity of the Earth's orbit at the given Julian dates."""
+    return 0.016708634 - 0.000042037 * _centuries(jd)
+
+
+def mean_obliquity(jd):
+    """Mean obliquity of the ecliptic at the given Julian dates, in degrees."""
+    return 23.439291 - 0.0130042 * _centuries(jd)
+
+
+def perihelion_longitude(jd):
+    """Longitude of the Earth's perihelion at the given Julian dates, in degrees."""
+    return 102.93735 + 1.71946 * _centuries(jd)
+
+
+def _wrap(degrees):
+    """Reduce angles to the range [-180, 180)."""
+    return (degrees + 180) % 360 - 180
+
+
+def solar_position(times) -> SolarPosition:
+    """Compute the Sun's apparent place and the equation of time at the given times."""
+    jd = julian_date(times)
+    days = jd - J2000
+
+    mean_longitude = 280.460 + 0.9856474 * days
+    mean_anomaly = np.radians((357.528 + 0.9856003 * days) % 360)
+    e = eccentricity(jd)
+    obliquity = np.radians(mean_obliquity(jd))
+
+    E = kepler.solve(mean_anomaly, e)
+    true_anomaly = kepler.true_anomaly(E, e)
+    distance = 1.000001018 * (1 - e * np.cos(E))
+
+    longitude = mean_longitude + np.degrees(true_anomaly - mean_anomaly)
+    sin_longitude = np.sin(np.radians(longitude))
+    right_ascension = np.degrees(np.arctan2(np.cos(obliquity) * sin_longitude,
+                                            np.cos(np.radians(longitude))))
+    declination = np.degrees(np.arcsin(np.sin(obliquity) * sin_longitude))
+
+    # Apparent minus mean time splits into the orbit's uneven speed (mean
+    # minus true anomaly) and the projection onto the equator (longitude
+    # minus right ascension)
+    eccentricity_term = _wrap(np.degrees(mean_anomaly - true_anomaly)) * MINUTES_PER_DEGREE
+    obliquity_term = _wrap(longitude - right_ascension) * MINUTES_PER_DEGREE
+
+    return SolarPosition(
+        julian_date=jd,
+        mean_anomaly=np.degrees(mean_anomaly),
+        longitude=longitude % 360,
+        right_ascension=right_ascension % 360,
+        declination=declination,
+        distance=distance,
+        equation_of_time=eccentricity_term + obliquity_term,
+        eccentricity_term=eccentricity_term,
+        obliquity_term=obliquity_term,
+    )
+
+
+def earth_velocity(times, frame='equatorial'):
+    """The Earth's orbital velocity as a fraction of the speed of light.
+
+    Args:
+        times: datetime64 values or Julian dates, any shape
+        frame: 'equatorial' or 'ecliptic', both of date
+
+    Returns:
+        array of shape times.shape + (3,)
+    """
+    if frame not in ('equatorial', 'ecliptic'):
+        raise ValueError(f"unknown frame {frame!r}; expected 'equatorial' or 'ecliptic'")
+    jd = julian_date(times)
+    sun_longitude = np.radians(solar_position(jd).longitude)
+    perihelion = np.radians(perihelion_longitude(jd))
+    e = eccentricity(jd)
+    speed = np.radians(ABERRATION_CONSTANT / 3600)
+
+    # Perpendicular to the Sun's direction, plus the eccentricity term
+    x = speed * (np.sin(sun_longitude) - e * np.sin(perihelion))
+    y = speed * (-np.cos(sun_longitude) + e * np.cos(perihelion))
+    z = np.zeros_like(x)
+    if frame == 'equatorial':
+        obliquity = np.radians(mean_obliquity(jd))
+        y, z = y * np.cos(obliquity), y * np.sin(obliquity)
+    return np.stack([x, y, z], axis=-1)
+
+
+@functools.lru_cache(maxsize=32)
+def solar_grid(start: str, stop: str, step: str = '1D') -> SolarPosition:
+    """Solar positions every step from start up to (not including) stop, memoized.
+
+    Args:
+        start, stop: ISO dates or times, e.g. '2001-01-01'
+        step: numpy timedelta, as a count and unit, e.g. '1D', '1h' or '1m'
+
+    Returns:
+        SolarPosition with read-only arrays; times are in its julian_date field
+    """
+    count, unit = int(step[:-1] or 1), step[-1]
+    times = np.arange(np.datetime64(start), np.datetime64(stop), np.timedelta64(count, unit))
+    position = solar_position(times)
+    for field in position:
+        field.flags.writeable = False
+    return position
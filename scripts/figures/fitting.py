@@ -0,0 +1,161 @@
+"""Least-squares fits of sinusoids of known period, with formal errors and a bootstrap.
+
+A sinusoid y = a cos(wt) + b sin(wt) + c is linear in (a, b, c), so its
+amplitude, phase and offset follow from linear least squares on the basis
+(cos wt, sin wt, 1), with no iteration or starting guess. fit_sinusoid()
+solves the normal equations for any number of series at once: the data may
+carry leading batch axes, and the 3 x 3 normal matrices of every series
+are inverted in one batched call. The formal errors come from the covariance of (a, b, c),
+propagated to amplitude and phase.
+
+bootstrap() uses the same batching to refit thousands of resampled data
+sets in a single solve, giving the spread of the fit (and of the curve
+itself, through SinusoidFit.evaluate) without assuming normal errors.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+# Resampled data sets that can be refit: residuals keep the epochs, pairs
+# resample (time, value) together
+RESAMPLING = ('residuals', 'pairs')
+
+
+class SinusoidFit(NamedTuple):
+    """Fitted y = amplitude cos(2 pi (t / period) - phase) + offset, as arrays.
+
+    Each field has the batch shape of the fitted data (coefficients and
+    covariance add trailing axes of 3 and 3 x 3); the phase is in radians
+    in (-pi, pi], and the errors are formal one-sigma errors.
+    """
+
+    period: float
+    coefficients: np.ndarray
+    covariance: np.ndarray
+    amplitude: np.ndarray
+    phase: np.ndarray
+    offset: np.ndarray
+    amplitude_error: np.ndarray
+    phase_error: np.ndarray
+    offset_error: np.ndarray
+    residual_std: np.ndarray
+
+    def evaluate(self, times):
+        """Evaluate the fitted curves at times of shape (M,), giving batch shape + (M,)."""
+        basis = design_matrix(times, self.period)
+        return np.einsum('mk,...k->...m', basis, self.coefficients)
+
+
+def design_matrix(times, period):
+    """Return the basis (cos wt, sin wt, 1) at the given times, shape times.shape + (3,)."""
+    angle = 2 * np.pi * np.asarray(times, dtype=float) / period
+    return np.stack([np.cos(angle), np.sin(angle), np.ones_like(angle)], axis=-1)
+
+
+def solve(design, values, weights=None):
+    """Solve batched weighted least-squares problems through the normal equations.
+
+    Args:
+        design: design matrices of shape (..., N, K)
+        values: data of shape (..., N), broadcastable against design
+        weights: optional weights (inverse variances) of shape (..., N)
+
+    Returns:
+        tuple of (coefficients, inverse normal matrix), shapes (..., K) and
+        (..., K, K)
+    """
+    transposed = np.swapaxes(design, -1, -2)
+    if weights is not None:
+        transposed = transposed * np.asarray(weights, dtype=float)[..., np.newaxis, :]
+    normal = transposed @ design
+    right = (transposed @ np.asarray(values, dtype=float)[..., np.newaxis])[..., 0]
+    inverse = np.linalg.inv(normal)
+    return (inverse @ right[..., np.newaxis])[..., 0], inverse
+
+
+def fit_sinusoid(times, values, period, sigma=None):
+    """Fit amplitude, phase and offset of a sinusoid of known period.
+
+    Args:
+        times: observation times, shape (..., N), in the units of period
+        values: observations, shape (..., N); leading axes are independent series
+        period: period of the sinusoid
+        sigma: optional one-sigma errors of the values. Without them the
+            covariance is scaled by the residual variance, with N - 3
+            degrees of freedom.
+
+    Returns:
+        SinusoidFit
+
+    Raises:
+        ValueError: if there are fewer than three observations per series
+    """
+    times, values = np.broadcast_arrays(np.asarray(times, dtype=float),
+                                        np.asarray(values, dtype=float))
+    count = times.shape[-1]
+    if count < 3:
+        raise ValueError(f"need at least 3 observations to fit a sinusoid, got {count}")
+
+    design = design_matrix(times, period)
+    weights = None if sigma is None else 1 / np.broadcast_to(sigma, values.shape) ** 2
+    coefficients, covariance = solve(design, values, weights)
+    residuals = values - (design @ coefficients[..., np.newaxis])[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        residual_std = np.sqrt(np.sum(residuals ** 2, axis=-1) / (count - 3))
+    if sigma is None:
+        covariance = covariance * residual_std[..., np.newaxis, np.newaxis] ** 2
+
+    a, b, offset = np.moveaxis(coefficients, -1, 0)
+    var_a, var_b, var_offset = np.moveaxis(np.diagonal(covariance, axis1=-2, axis2=-1), -1, 0)
+    cov_ab = covariance[..., 0, 1]
+    amplitude = np.hypot(a, b)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amplitude_error = np.sqrt(a**2 * var_a + b**2 * var_b + 2 * a * b * cov_ab) / amplitude
+        phase_error = np.sqrt(b**2 * var_a + a**2 * var_b - 2 * a * b * cov_ab) / amplitude**2
+    return SinusoidFit(
+        period=period,
+        coefficients=coefficients,
+        covariance=covariance,
+        amplitude=amplitude,
+        phase=np.arctan2(b, a),
+        offset=offset,
+        amplitude_error=amplitude_error,
+        phase_error=phase_error,
+        offset_error=np.sqrt(var_offset),
+        residual_std=residual_std,
+    )
+
+
+def bootstrap(times, values, period, samples=4000, resampling='residuals', seed=0):
+    """Refit a sinusoid to many resampled copies of one data set, in one batched solve.
+
+    Args:
+        times, values: observations, shape (N,)
+        period: period of the sinusoid
+        samples: number of resampled data sets
+        resampling: 'residuals' adds resampled residuals of the best fit to
+            the fitted values at the observed times; 'pairs' draws
+            observations with replacement. Resamples of pairs that cannot
+            determine a sinusoid (e.g. fewer than three distinct phases) are
+            dropped.
+        seed: seed for the random generator
+
+    Returns:
+        SinusoidFit whose fields have a leading axis of resamples
+    """
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(times), size=(samples, len(times)))
+
+    if resampling == 'residuals':
+        best = fit_sinusoid(times, values, period)
+        fitted = best.evaluate(times)
+        # Rescale so the resampled residuals have the unbiased variance
+        residuals = (values - fitted) * np.sqrt(len(times) / (len(times) - 3))
+        return fit_sinusoid(times, fitted + residuals[picks], period)
+    if resampling == 'pairs':
+        picks = picks[np.linalg.matrix_rank(design_matrix(times[picks], period)) == 3]
+        return fit_sinusoid(times[picks], values[picks], period)
+    raise ValueError(f"unknown resampling {resampling!r}; expected one of {RESAMPLING}")
@@ -0,0 +1,81 @@
+"""Kepler's equation and elliptical orbit positions, solved for whole arrays.
+
+solve() finds the eccentric anomaly E from M = E - e sin E for any number of
+(mean anomaly, eccentricity) pairs at once. Newton's method starts from
+Danby's guess E = M + 0.85 e sign(sin M), which converges for every
+eccentricity below 1, and each pass only updates the entries that have not
+yet converged, so a few stubborn near-parabolic entries do not cost a full
+pass over millions of easy ones.
+"""
+
+import numpy as np
+
+# Largest eccentricity accepted; beyond this the orbit is effectively parabolic
+MAX_ECCENTRICITY = 0.999
+
+
+def solve(mean_anomaly, eccentricity, tolerance=1e-12, max_iterations=50):
+    """Solve Kepler's equation for the eccentric anomaly, in radians.
+
+    Args:
+        mean_anomaly: mean anomaly in radians, any shape
+        eccentricity: eccentricity in [0, MAX_ECCENTRICITY], broadcastable
+            against mean_anomaly
+        tolerance: largest acceptable |E - e sin E - M|
+        max_iterations: Newton steps before giving up
+
+    Returns:
+        array of eccentric anomalies, in the same turn as mean_anomaly
+
+    Raises:
+        ValueError: if an eccentricity is out of range or an entry fails to converge
+    """
+    M, e = np.broadcast_arrays(np.asarray(mean_anomaly, dtype=float),
+                               np.asarray(eccentricity, dtype=float))
+    if np.any((e < 0) | (e > MAX_ECCENTRICITY)):
+        raise ValueError(f"eccentricity must lie in [0, {MAX_ECCENTRICITY}]")
+
+    # Work with M reduced to [-pi, pi) and restore the whole turns at the end
+    turns = np.floor((M + np.pi) / (2 * np.pi))
+    M = (M - 2 * np.pi * turns).ravel()
+    e = e.ravel()
+    E = M + 0.85 * e * np.sign(np.sin(M))
+
+    active = np.arange(M.size)
+    for _ in range(max_iterations):
+        Ea, ea = E[active], e[active]
+        residual = Ea - ea * np.sin(Ea) - M[active]
+        unconverged = np.abs(residual) > tolerance
+        active, Ea, ea, residual = (active[unconverged], Ea[unconverged],
+                                    ea[unconverged], residual[unconverged])
+        if not active.size:
+            break
+        E[active] = Ea - residual / (1 - ea * np.cos(Ea))
+    else:
+        raise ValueError(f"Kepler's equation did not converge for {active.size} entries "
+                         f"in {max_iterations} iterations")
+
+    return E.reshape(turns.shape) + 2 * np.pi * turns
+
+
+def true_anomaly(eccentric_anomaly, eccentricity):
+    """Convert eccentric anomaly to true anomaly, in radians, keeping the quadrant."""
+    E = np.asarray(eccentric_anomaly, dtype=float)
+    e = np.asarray(eccentricity, dtype=float)
+    return 2 * np.arctan2(np.sqrt(1 + e) * np.sin(E / 2), np.sqrt(1 - e) * np.cos(E / 2))
+
+
+def orbit_position(mean_anomaly, semi_major_axis, eccentricity):
+    """Position in the orbital plane, with the focus at the origin and perihelion on +x.
+
+    Returns:
+        tuple of (x, y) arrays, in the units of semi_major_axis
+    """
+    E = solve(mean_anomaly, eccentricity)
+    a, e = semi_major_axis, np.asarray(eccentricity, dtype=float)
+    return a * (np.cos(E) - e), a * np.sqrt(1 - e**2) * np.sin(E)
+
+
+def mean_anomaly(times, perihelion_time, period):
+    """Mean anomaly in radians at the given times, which share units with period."""
+    return 2 * np.pi * (np.asarray(times, dtype=float) - perihelion_time) / period
@@ -0,0 +1,123 @@
+"""Life tables from hazard schedules or survivor counts, over arrays.
+
+A life table is held as survivors l[x], the number still alive at each age
+x of a cohort, or equivalently as the yearly hazard q[x] = 1 - l[x+1] / l[x].
+Every function works on the last axis, so a stack of schedules of shape
+(..., ages), e.g. thousands of perturbed versions of Halley's table, is
+evaluated with cumulative products and sums instead of a loop over ages.
+"""
+
+import numpy as np
+
+
+def halley_breslau():
+    """Halley's 1693 table of the living at Breslau, by age current.
+
+    Halley's 'age current' x counts those in their x-th year, so the 1000 at
+    age 1 are the children not yet one year old.
+
+    Returns:
+        tuple of (ages, persons) arrays for ages 1 to 84
+    """
+    persons = [
+        1000, 855, 798, 760, 732, 710, 692, 680, 670, 661,    # 1-10
+        653, 646, 640, 634, 628, 622, 616, 610, 604, 598,     # 11-20
+        592, 586, 579, 573, 567, 560, 553, 546, 539, 531,     # 21-30
+        523, 515, 507, 499, 490, 481, 472, 463, 454, 445,     # 31-40
+        436, 427, 417, 407, 397, 387, 377, 367, 357, 346,     # 41-50
+        335, 324, 313, 302, 292, 282, 272, 262, 252, 242,     # 51-60
+        232, 222, 212, 202, 192, 182, 172, 162, 152, 142,     # 61-70
+        131, 120, 109, 98, 88, 78, 68, 58, 49, 41,            # 71-80
+        34, 28, 23, 20,                                       # 81-84
+    ]
+    return np.arange(1, len(persons) + 1), np.array(persons, dtype=float)
+
+
+def band_hazards(edges, rates, ages):
+    """Expand age-banded hazard rates to one rate per age.
+
+    Args:
+        edges: increasing band boundaries; band i covers edges[i] <= age < edges[i+1]
+        rates: hazard per band, shape (..., len(edges) - 1)
+        ages: ages to evaluate, within [edges[0], edges[-1])
+
+    Returns:
+        array of shape (..., len(ages))
+    """
+    band = np.searchsorted(edges, ages, side='right') - 1
+    return np.take(np.asarray(rates, dtype=float), band, axis=-1)
+
+
+def hazards(survivors):
+    """Return the yearly hazard q[x] = 1 - l[x+1] / l[x] implied by survivor counts.
+
+    The result is one age shorter than survivors.
+    """
+    survivors = np.asarray(survivors, dtype=float)
+    return 1 - survivors[..., 1:] / survivors[..., :-1]
+
+
+def survivors(q, radix=1000):
+    """Return survivors l[x] of a cohort of radix subject to yearly hazards q.
+
+    The result is one age longer than q and starts at radix.
+    """
+    q = np.asarray(q, dtype=float)
+    alive = np.cumprod(1 - q, axis=-1)
+    start = np.ones(q.shape[:-1] + (1,))
+    return radix * np.concatenate([start, alive], axis=-1)
+
+
+def _remaining_sum(values):
+    """Sum of values[t] for t > x, for each x (zero at the last age)."""
+    total = np.cumsum(values[..., ::-1], axis=-1)[..., ::-1]
+    return total - values
+
+
+def life_expectancy(survivors):
+    """Return the expectation of life at each age, in years.
+
+    Deaths are taken to fall midway through the year, so this is the curtate
+    expectation plus one half; the table is assumed to close at its last age.
+    """
+    survivors = np.asarray(survivors, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _remaining_sum(survivors) / survivors + 0.5
+
+
+def annuity_values(survivors, interest):
+    """Return the value at each age of a life annuity of 1 a year, paid in arrears.
+
+    This is Halley's calculation: each future payment is discounted at the
+    interest rate and weighted by the chance of being alive to receive it.
+
+    Args:
+        survivors: l[x], shape (..., ages)
+        interest: yearly interest rate, e.g. 0.06
+    """
+    survivors = np.asarray(survivors, dtype=float)
+    discounted = survivors * (1 + interest) ** -np.arange(survivors.shape[-1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return _remaining_sum(discounted) / discounted
+
+
+def perturbed_hazards(q, edges, ages, spread, samples, seed=0):
+    """Draw alternative schedules by scaling q by a random factor per age band.
+
+    Each band's factor is log-normal with median 1, so schedules stay
+    positive and within a band the shape of q is kept.
+
+    Args:
+        q: base hazards, one per age
+        edges: band boundaries, as for band_hazards()
+        ages: age of each entry of q
+        spread: standard deviation of the log factor, e.g. 0.15 for about 15%
+        samples: number of schedules
+        seed: random seed, so figures are reproducible
+
+    Returns:
+        array of shape (samples, len(q)), clipped to [0, 1]
+    """
+    rng = np.random.default_rng(seed)
+    factors = np.exp(rng.normal(0, spread, (samples, len(edges) - 1)))
+    return np.clip(np.asarray(q) * band_hazards(edges, factors, ages), 0, 1)
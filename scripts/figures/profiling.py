@@ -0,0 +1,125 @@
+"""Opt-in cProfile and tracemalloc capture around figure renders.
+
+Set FIGURE_PROFILING=1 (or to a directory) and every figure rendered through
+the registry writes, to build/profile/ (or that directory):
+
+    chNN-name.prof   cProfile stats, for pstats, snakeviz, etc.
+    chNN-name.txt    time split, peak traced memory and the top allocations
+                     live once the PNG is encoded
+
+The time split separates building the figure (running the figure function),
+drawing it, text layout and rendering (including usetex) and PNG encoding.
+Drawing includes the text drawn during it; profiling overhead inflates all
+of them.
+"""
+
+import contextlib
+import cProfile
+import functools
+import time
+import tracemalloc
+from collections import defaultdict
+
+import matplotlib.image
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.figure import Figure
+
+# Allocations listed in each summary
+TOP_ALLOCATIONS = 15
+
+# (owner, attribute, phase) for every function whose time is attributed to a phase
+_TIMED = [
+    (Figure, 'draw', 'draw'),
+    (RendererAgg, 'draw_text', 'text'),
+    (RendererAgg, 'draw_tex', 'text'),
+    (RendererAgg, 'get_text_width_height_descent', 'text'),
+    (matplotlib.image, 'imsave', 'encode'),
+]
+
+
+class PhaseTimer:
+    """Accumulate wall-clock time per phase, counting nested calls once."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self._depth = defaultdict(int)
+
+    @contextlib.contextmanager
+    def timing(self, phase: str):
+        self._depth[phase] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[phase] -= 1
+            if not self._depth[phase]:
+                self.totals[phase] += time.perf_counter() - start
+
+    def wrap(self, func, phase: str):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            with self.timing(phase):
+                return func(*args, **kwargs)
+        return timed
+
+
+@contextlib.contextmanager
+def profiled(figure_id: str, directory):
+    """Profile the enclosed render of one figure and write its reports.
+
+    Yields:
+        PhaseTimer; time the figure function itself with timing('build')
+    """
+    timer = PhaseTimer()
+    originals = [(owner, name, vars(owner)[name]) for owner, name, _ in _TIMED]
+    for owner, name, phase in _TIMED:
+        setattr(owner, name, timer.wrap(getattr(owner, name), phase))
+
+    # Snapshot allocations once the PNG is encoded, while the figure, renderer
+    # and image buffers are all still alive
+    snapshots = []
+    encode = matplotlib.image.imsave
+
+    def imsave(*args, **kwargs):
+        try:
+            return encode(*args, **kwargs)
+        finally:
+            snapshots.append(tracemalloc.take_snapshot())
+    matplotlib.image.imsave = imsave
+
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield timer
+    finally:
+        profiler.disable()
+        total = time.perf_counter() - start
+        snapshot = snapshots[-1] if snapshots else tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        for owner, name, original in originals:
+            setattr(owner, name, original)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(directory / f"{figure_id}.prof")
+    phases = dict(timer.totals, total=total)
+    (directory / f"{figure_id}.txt").write_text(_summary(figure_id, phases, peak, snapshot))
+    print(f"Profiled {figure_id}: " + ", ".join(
+        f"{phase} {phases.get(phase, 0.0):.3f}s" for phase in ('total', 'build', 'draw', 'text', 'encode')))
+
+
+def _summary(figure_id: str, phases: dict, peak: int, snapshot) -> str:
+    lines = [figure_id, ""]
+    for phase, label in (('total', 'total'), ('build', 'build (figure function)'),
+                         ('draw', 'draw (including text)'), ('text', 'text and TeX'),
+                         ('encode', 'PNG encode')):
+        lines.append(f"{label:26s} {phases.get(phase, 0.0):8.3f} s")
+    lines += ["", f"peak traced memory         {peak / 2**20:8.1f} MiB", "",
+              f"Top {TOP_ALLOCATIONS} allocations by size:"]
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        lines.append(f"  {stat.size / 2**10:10.1f} KiB {stat.count:8d} blocks  "
+                     f"{frame.filename}:{frame.lineno}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Render chapter figures from a single driver process.
+
+Each chNN.py module is imported once, which registers its @figure functions,
+and the selected figures are rendered across a pool of worker processes
+sized to the core count. Figures whose cache key is unchanged since the last
+render are skipped without drawing anything.
+
+Every run except --list also refreshes the per-figure Make dependency files in
+src/figures/generated/.deps/, which list the exact functions, classes,
+module constants and datasets each figure uses.
+
+Examples:
+    render.py                          # every stale figure
+    render.py --list                   # registered figures and cache state
+    render.py --only ch15-analemma     # a single figure
+    render.py --only 'ch12-*'          # every figure matching a glob
+    render.py --deps                   # only refresh the dependency files
+    render.py --prewarm                # typeset all TeX labels in parallel first
+    render.py --draft                  # fast low-resolution renders for watch mode
+"""
+
+import argparse
+import fnmatch
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import common
+import datasets
+import texcache
+
+SCRIPT_DIR = Path(__file__).parent
+
+
+def load_chapters():
+    """Import every chapter module, in chapter order, filling the registry."""
+    return [importlib.import_module(path.stem)
+            for path in sorted(SCRIPT_DIR.glob('ch[0-9][0-9].py'))]
+
+
+def select_figures(patterns=None):
+    """Return the registered figures matching any of the glob patterns, in chapter order."""
+    figures = sorted(common.FIGURES.values(),
+                     key=lambda spec: (spec.chapter, spec.func.__code__.co_firstlineno))
+    if not patterns:
+        return figures
+    return [spec for spec in figures
+            if any(fnmatch.fnmatchcase(spec.id, pattern) for pattern in patterns)]
+
+
+def _relative(path: Path) -> str:
+    return os.path.relpath(path, common.PROJECT_ROOT)
+
+
+def write_dependency_files(figures):
+    """Write a Make dependency file per figure and a fingerprint per dependency.
+
+    Each src/figures/generated/.deps/chNN-name.d makes the PNG depend on one
+    .fn fingerprint file per function, class and module-level constant the
+    figure uses, the CSV source of each dataset it loads, and a fingerprint
+    of the shared style and library versions. Fingerprints are only rewritten
+    when their content changes, so Make sees exactly the figures whose
+    definitions were edited as out of date. figures.mk lists every PNG and
+    includes the dependency files.
+    """
+    environment = common.DEPS_DIR / 'environment.fn'
+    common.write_if_changed(environment, common.environment_fingerprint() + "\n")
+    for spec in figures:
+        functions = common.dependencies(spec.func)
+        stamps = []
+        for func in functions:
+            stamp = common.DEPS_DIR / f"{common.function_id(func)}.fn"
+            common.write_if_changed(stamp, common.function_fingerprint(func) + "\n")
+            stamps.append(stamp)
+        data = common.data_dependencies(spec.func)
+        stamps += [datasets.source_path(name) for name in data]
+        lines = [f"# {spec.id} uses:"]
+        lines += [f"#   {common.function_id(func)}" for func in functions]
+        lines += [f"#   dataset {name}" for name in data]
+        lines.append(f"{_relative(spec.path)}: \\")
+        lines += [f"  {_relative(stamp)} \\" for stamp in stamps]
+        lines.append(f"  {_relative(environment)}")
+        common.write_if_changed(common.DEPS_DIR / f"{spec.id}.d", "\n".join(lines) + "\n")
+
+    index = ["# Generated by scripts/figures/render.py", "FIGURE_PNGS := \\"]
+    index += [f"  {_relative(spec.path)} \\" for spec in figures]
+    index += ["", f"-include $(wildcard {_relative(common.DEPS_DIR)}/*.d)"]
+    common.write_if_changed(common.DEPS_DIR / 'figures.mk', "\n".join(index) + "\n")
+
+
+def render_one(figure_id: str):
+    """Render a single registered figure.
+
+    Returns:
+        tuple of (wall-clock seconds, manifest entry)
+    """
+    start = time.perf_counter()
+    entry = common.render(common.FIGURES[figure_id])
+    return time.perf_counter() - start, entry
+
+
+def collect_one(figure_id: str) -> set:
+    """Collect a figure's TeX requests, or none if it fails to draw.
+
+    A failing figure is reported by the render pass that follows.
+    """
+    try:
+        return texcache.collect(common.FIGURES[figure_id])
+    except Exception:
+        return set()
+
+
+def list_figures(figures, manifest):
+    """Print each figure's identifier, function and cache state."""
+    for spec in figures:
+        function = f"{spec.func.__module__}.{spec.func.__name__}"
+        state = 'current' if common.is_current(spec, manifest) else 'stale'
+        print(f"{spec.id:40s} {function:36s} {state}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of worker processes (default: core count)')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='re-render figures even if their cache key is unchanged')
+    parser.add_argument('-o', '--only', action='append', metavar='PATTERN',
+                        help='render only figures whose id matches this glob (repeatable)')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='list the selected figures instead of rendering them')
+    parser.add_argument('--deps', action='store_true',
+                        help='refresh the Make dependency files without rendering')
+    parser.add_argument('--prewarm', action='store_true',
+                        help='typeset every TeX string of the stale figures first, in parallel')
+    parser.add_argument('--draft', action='store_true',
+                        help='use the draft profile (same as FIGURE_PROFILE=draft)')
+    args = parser.parse_args(argv)
+    if args.draft:
+        common.use_profile('draft')
+
+    load_chapters()
+    if not args.list:
+        write_dependency_files(select_figures())
+    if args.deps:
+        return 0
+    manifest = common.load_manifest()
+    figures = select_figures(args.only)
+    if not figures:
+        print(f"No figures match {', '.join(args.only)}", file=sys.stderr)
+        return 1
+    if args.list:
+        list_figures(figures, manifest)
+        return 0
+
+    tasks = [spec.id for spec in figures
+             if args.force or not common.is_current(spec, manifest)]
+    skipped = len(figures) - len(tasks)
+    if not tasks:
+        print(f"All {skipped} figures are up to date")
+        return 0
+    jobs = max(1, min(args.jobs, len(tasks)))
+
+    start = time.perf_counter()
+    failures = []
+    busy = 0.0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=load_chapters) as pool:
+        if args.prewarm and common.uses_tex():
+            requests = set().union(*pool.map(collect_one, tasks))
+            texcache.typeset(requests, jobs=os.cpu_count())
+            print(f"Pre-warmed {len(requests)} TeX strings in "
+                  f"{time.perf_counter() - start:.2f}s")
+        futures = {pool.submit(render_one, figure_id): figure_id for figure_id in tasks}
+        for future in as_completed(futures):
+            figure_id = futures[future]
+            try:
+                elapsed, entry = future.result()
+            except Exception as exc:
+                failures.append(figure_id)
+                print(f"  FAILED  {figure_id}: {exc}", file=sys.stderr)
+                continue
+            manifest[figure_id] = entry
+            busy += elapsed
+            print(f"{elapsed:8.2f}s  {figure_id}")
+    common.write_manifest(manifest)
+
+    total = time.perf_counter() - start
+    print(f"Rendered {len(tasks) - len(failures)}/{len(tasks)} figures in {total:.2f}s "
+          f"({jobs} workers, {busy:.2f}s of figure time, {skipped} up to date)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
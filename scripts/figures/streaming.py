@@ -0,0 +1,101 @@
+"""Streaming mean, variance and standard error for many series at once.
+
+RunningStats holds Welford's running state (count, mean and the sum of
+squared deviations M2) for a batch of independent series, e.g. one per
+simulated observer, and folds in observations a block at a time with Chan's
+parallel update. Memory depends on the block size, not on how many
+observations have been seen, and no prefix is ever re-summed, so running
+statistics over 10^6 observations cost one pass.
+"""
+
+import numpy as np
+
+
+def _merge(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """Chan et al.'s combination of two sets of (count, mean, M2)."""
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    weight = np.divide(count_b, count, out=np.zeros_like(delta), where=count > 0)
+    mean = mean_a + delta * weight
+    m2 = m2_a + m2_b + delta ** 2 * count_a * weight
+    return count, mean, m2
+
+
+class RunningStats:
+    """Running statistics of independent series, with observations on the last axis.
+
+    Args:
+        shape: shape of the batch of series, e.g. (10_000,) for 10^4 observers
+    """
+
+    def __init__(self, shape=()):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def update(self, block):
+        """Fold in a block of observations of shape shape + (k,)."""
+        block = np.asarray(block, dtype=float)
+        count = block.shape[-1]
+        if count == 0:
+            return self
+        mean = block.mean(axis=-1)
+        m2 = ((block - mean[..., np.newaxis]) ** 2).sum(axis=-1)
+        self.count, self.mean, self.m2 = _merge(self.count, self.mean, self.m2,
+                                                count, mean, m2)
+        return self
+
+    def accumulate(self, block):
+        """Fold in a block of observations, returning the statistics after each one.
+
+        Within the block, prefix sums are taken about the running mean so far
+        (or the first observation), which keeps them small and the variance
+        accurate, and each prefix is merged with the state from earlier blocks.
+
+        Returns:
+            tuple of (count, mean, variance) arrays; count has shape (k,), mean
+            and variance shape + (k,). The variance is NaN after one observation.
+        """
+        block = np.asarray(block, dtype=float)
+        counts = np.arange(1, block.shape[-1] + 1)
+        origin = (self.mean if self.count else block[..., 0])[..., np.newaxis]
+        shifted = block - origin
+        sums = np.cumsum(shifted, axis=-1)
+        block_mean = sums / counts
+        block_m2 = np.cumsum(shifted ** 2, axis=-1) - sums * block_mean
+
+        count, mean, m2 = _merge(self.count, self.mean[..., np.newaxis] - origin,
+                                 self.m2[..., np.newaxis], counts, block_mean,
+                                 np.maximum(block_m2, 0))
+        mean = mean + origin
+        self.count, self.mean, self.m2 = count[-1], mean[..., -1], m2[..., -1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return count, mean, m2 / (count - 1)
+
+    def merge(self, other):
+        """Fold in the state of another RunningStats over the same series."""
+        self.count, self.mean, self.m2 = _merge(self.count, self.mean, self.m2,
+                                                other.count, other.mean, other.m2)
+        return self
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1) of each series."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        """Sample standard deviation of each series."""
+        return np.sqrt(self.variance)
+
+    @property
+    def standard_error(self):
+        """Standard error of each series' mean."""
+        return self.std / np.sqrt(self.count)
+
+
+def blocks(total, size):
+    """Yield (start, stop) bounds that split range(total) into blocks of at most size."""
+    for start in range(0, total, size):
+        yield start, min(start + size, total)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Generate the book's LaTeX tables from the same datasets as the figures.
+
+A table is a function in a chapter module, registered with @table from
+common.py, that returns a booktabs tabular built with booktabs() below. The
+chapter keeps the float, caption, label and notes, and inputs the fragment:
+
+    \\begin{table}[htbp]
+      \\centering
+      \\caption{...}
+      \\label{tab:dead-reckoning-error}
+      \\input{tables/generated/ch01-dead-reckoning-error}
+    \\end{table}
+
+Every run regenerates each fragment in memory but only rewrites the files
+whose text changed, so latexmk sees a new fragment (and runs another
+pdflatex pass) only when its data or formatting really changed.
+
+Examples:
+    tables.py                          # every table
+    tables.py --list                   # registered tables and their datasets
+    tables.py --only 'ch13-*'          # tables matching a glob
+"""
+
+import argparse
+import fnmatch
+import os
+import sys
+
+import common
+import datasets
+import numpy as np
+import render
+
+# Characters with a special meaning in LaTeX text, and their escapes
+_ESCAPES = {'&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#', '_': r'\_',
+            '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}', '^': r'\textasciicircum{}'}
+
+
+def escape(text) -> str:
+    """Escape a value for use as LaTeX text."""
+    return ''.join(_ESCAPES.get(char, char) for char in str(text))
+
+
+def number(value) -> str:
+    """Format a number without exponent or trailing zeros, e.g. 0.00001 or 150."""
+    return np.format_float_positional(float(value), trim='-')
+
+
+def span(low, high, unit='') -> str:
+    """Format a range as 'low--high', or a single value when the ends agree.
+
+    Values are set in math mode when unit is given (e.g. "''" for arcseconds).
+    """
+    if unit:
+        low_text, high_text = f"${number(low)}{unit}$", f"${number(high)}{unit}$"
+    else:
+        low_text, high_text = number(low), number(high)
+    return low_text if low == high else f"{low_text}--{high_text}"
+
+
+def booktabs(header, rows, align=None, header_style='textsc') -> str:
+    """Render a booktabs tabular.
+
+    Args:
+        header: column headings, as LaTeX (escape() plain text first)
+        rows: rows of cells, each already formatted as LaTeX
+        align: column specification, e.g. 'lrl' (default: all 'l')
+        header_style: command applied to each heading, e.g. 'textsc' or
+            'textbf', or None for none
+
+    Raises:
+        ValueError: if a row's length differs from the header's
+    """
+    align = align or 'l' * len(header)
+    if header_style:
+        header = [f"\\{header_style}{{{cell}}}" for cell in header]
+    lines = [f"\\begin{{tabular}}{{{align}}}", "  \\toprule",
+             "  " + " & ".join(header) + r" \\", "  \\midrule"]
+    for index, row in enumerate(rows, start=1):
+        if len(row) != len(header):
+            raise ValueError(f"row {index} has {len(row)} cells; expected {len(header)}")
+        lines.append("  " + " & ".join(row) + r" \\")
+    lines += ["  \\bottomrule", "\\end{tabular}"]
+    return "\n".join(lines) + "\n"
+
+
+def generate(spec: common.Table) -> bool:
+    """Generate one table fragment, writing it only if its text changed.
+
+    Returns:
+        True if the file was written
+    """
+    sources = [os.path.relpath(datasets.source_path(name), common.PROJECT_ROOT)
+               for name in common.data_dependencies(spec.func)]
+    comment = f"% Generated by scripts/figures/tables.py from {spec.func.__module__}.{spec.func.__name__}"
+    if sources:
+        comment += f" and {', '.join(sources)}"
+    text = comment + "; do not edit.\n" + spec.func()
+    return common.write_if_changed(spec.path, text)
+
+
+def select_tables(patterns=None):
+    """Return the registered tables matching any of the glob patterns, in chapter order."""
+    tables = sorted(common.TABLES.values(),
+                    key=lambda spec: (spec.chapter, spec.func.__code__.co_firstlineno))
+    if not patterns:
+        return tables
+    return [spec for spec in tables
+            if any(fnmatch.fnmatchcase(spec.id, pattern) for pattern in patterns)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--only', action='append', metavar='PATTERN',
+                        help='generate only tables whose id matches this glob (repeatable)')
+    parser.add_argument('-l', '--list', action='store_true',
+                        help='list the selected tables instead of generating them')
+    args = parser.parse_args(argv)
+
+    render.load_chapters()
+    tables = select_tables(args.only)
+    if not tables:
+        print(f"No tables match {', '.join(args.only or ['*'])}", file=sys.stderr)
+        return 1
+    if args.list:
+        for spec in tables:
+            function = f"{spec.func.__module__}.{spec.func.__name__}"
+            data = ', '.join(common.data_dependencies(spec.func)) or '-'
+            print(f"{spec.id:40s} {function:36s} {data}")
+        return 0
+
+    written = [spec for spec in tables if generate(spec)]
+    for spec in written:
+        print(f"Generated: {os.path.relpath(spec.path, common.PROJECT_ROOT)}")
+    print(f"{len(written)} of {len(tables)} tables changed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Pre-warm the persistent TeX text cache shared by every figure worker.
+
+With usetex on, matplotlib typesets each distinct label at each font size by
+running latex (and, for the latex+dvipng engine, dvipng), caching the result
+under its cache directory. common.py points that directory at build/matplotlib
+so the cache persists across builds and is shared by all worker processes.
+
+Pre-warming collects every TeX string the selected figures will request by
+drawing them with TeX calls recorded instead of run, then typesets the
+missing strings before rendering starts. Each string still gets its own
+latex (and dvipng) run, as matplotlib caches one file per string; the runs
+are spread across a thread pool, so what pre-warming saves is the render
+workers waiting on TeX one string at a time, not the TeX runs themselves.
+"""
+
+import contextlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import common
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.texmanager import TexManager
+
+
+@contextlib.contextmanager
+def _recording(requests: set):
+    """Record TeX requests as (tex, fontsize, dpi) instead of running TeX.
+
+    Text extents are approximated from the string length so that layout
+    passes such as tight_layout still see plausible sizes.
+    """
+    measure = vars(TexManager)['get_text_width_height_descent']
+    draw_tex = RendererAgg.draw_tex
+
+    def record_extent(cls, tex, fontsize, renderer=None):
+        if tex.strip() == '':
+            return 0, 0, 0
+        requests.add((tex, fontsize, None))
+        scale = renderer.points_to_pixels(1.) if renderer else 1
+        return 0.5 * fontsize * len(tex) * scale, fontsize * scale, 0.2 * fontsize * scale
+
+    def record_draw(self, gc, x, y, s, prop, angle, *, mtext=None):
+        requests.add((s, prop.get_size_in_points(), self.dpi))
+
+    TexManager.get_text_width_height_descent = classmethod(record_extent)
+    RendererAgg.draw_tex = record_draw
+    try:
+        yield requests
+    finally:
+        TexManager.get_text_width_height_descent = measure
+        RendererAgg.draw_tex = draw_tex
+
+
+def collect(spec: common.Figure) -> set:
+    """Return every (tex, fontsize, dpi) request a registered figure makes.
+
+    The figure is drawn through savefig, into memory, exactly as it would be
+    when rendered, so tick labels and the tight-bbox pass are included.
+    """
+    requests = set()
+    with _recording(requests):
+        fig = spec.func()
+        try:
+            if mpl.rcParams['text.usetex']:
+                fig.savefig(io.BytesIO(), format='png', **common.SAVE_KWARGS)
+        finally:
+            plt.close(fig)
+    return requests
+
+
+def _typeset(request):
+    tex, fontsize, dpi = request
+    if dpi is not None and mpl.rcParams.get('text.latex.engine', 'latex+dvipng') == 'latex+dvipng':
+        TexManager.make_png(tex, fontsize, dpi)
+    else:
+        TexManager.make_dvi(tex, fontsize)
+
+
+def typeset(requests, jobs=None):
+    """Typeset every request missing from the cache, one string per TeX run, in parallel.
+
+    Cached strings return immediately; the per-string latex and dvipng runs
+    for the rest are independent subprocesses, so they run on a thread pool.
+    Writes into the cache are atomic, so concurrent workers can share it
+    safely.
+    """
+    # The TeX source, and so the cache entry, depends on the style's rcParams
+    with plt.rc_context():
+        common.setup_style()
+        TexManager()  # creates the cache directory
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            list(pool.map(_typeset, requests))
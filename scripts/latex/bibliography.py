@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Write a bibliography pruned to the entries a build cites.
+
+biber parses every entry of the \\addbibresource file on every run, though
+the book cites only some of them and a single chapter only a handful. This
+script takes the cited keys from the preflight index (see preflight.py),
+copies just those entries of src/bibliography/references.bib, ordered by
+key, to build/bib/, and main.tex reads that file when \\bibliographyfile
+is defined (make build and make watch define it with -pretex).
+
+The output starts with a digest of the key set and the selected entries'
+text, and is rewritten only when the digest changes. Editing an uncited
+entry, or any other part of references.bib, leaves the file untouched, so
+latexmk does not rerun biber for it. latexmkrc runs this script before
+each biber run of a build that reads build/bib/main.bib, so a citation
+added during make watch reaches the pruned file.
+
+As in biber, the first of several entries with the same key is used.
+Entries named by a crossref, xref or xdata field of a selected entry are
+selected too, and @string and @preamble blocks are always kept. A
+\\nocite{*} anywhere selects every entry.
+
+Examples:
+    bibliography.py                  # build/bib/main.bib, for the whole book
+    bibliography.py --chapter 14     # build/bib/ch14.bib, for one chapter
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+
+import preflight
+
+OUTPUT_DIR = preflight.PROJECT_ROOT / "build" / "bib"
+
+_ENTRY_START = re.compile(r'^\s*@(\w+)\s*([{(])', re.MULTILINE)
+_KEY = re.compile(r'\s*([^,\s]+)\s*,')
+_LINKS = re.compile(r'^\s*(?:crossref|xref|xdata)\s*=\s*[{"]([^}"]*)[}"]',
+                    re.MULTILINE | re.IGNORECASE)
+_KEEP_TYPES = {'string', 'preamble'}
+
+
+def entries(text):
+    """Split a .bib file into its blocks.
+
+    Returns:
+        list of (type, key, text) in file order; key is None for @string and
+        @preamble, and @comment blocks are dropped
+    """
+    blocks = []
+    position = 0
+    while (match := _ENTRY_START.search(text, position)):
+        kind = match.group(1).lower()
+        closing = '}' if match.group(2) == '{' else ')'
+        depth, end = 1, match.end()
+        while depth and end < len(text):
+            if text[end] == match.group(2):
+                depth += 1
+            elif text[end] == closing:
+                depth -= 1
+            end += 1
+        position = end
+        if kind == 'comment':
+            continue
+        key = None
+        if kind not in _KEEP_TYPES:
+            found = _KEY.match(text, match.end())
+            key = found.group(1) if found else None
+        blocks.append((kind, key, text[match.start():end].strip()))
+    return blocks
+
+
+def select(blocks, keys):
+    """Return the blocks for a set of cited keys, following crossref, xref and xdata.
+
+    Returns:
+        tuple of (kept, selected, missing): the @string/@preamble blocks in
+        file order, the entries ordered by key, and the cited keys with no entry
+    """
+    kept = [block for kind, key, block in blocks if kind in _KEEP_TYPES]
+    by_key = {}
+    for kind, key, block in blocks:
+        if key is not None:
+            by_key.setdefault(key, block)
+    if '*' in keys:
+        return kept, [by_key[key] for key in sorted(by_key)], set()
+
+    wanted, pending = set(), list(keys)
+    while pending:
+        key = pending.pop()
+        if key in wanted or key not in by_key:
+            continue
+        wanted.add(key)
+        for links in _LINKS.findall(by_key[key]):
+            pending += [link.strip() for link in links.split(',') if link.strip()]
+    return kept, [by_key[key] for key in sorted(wanted)], set(keys) - wanted
+
+
+def prune(keys, output) -> bool:
+    """Write the entries for keys to output, unless its digest shows it is current.
+
+    Returns:
+        True if the file was written
+    """
+    kept, selected, missing = select(entries(preflight.BIBLIOGRAPHY.read_text()), keys)
+    for key in sorted(missing):
+        print(f"warning: {key!r} is cited but not in {preflight.BIBLIOGRAPHY.name}", file=sys.stderr)
+    body = "\n\n".join(kept + selected) + "\n"
+    digest = hashlib.sha256(body.encode()).hexdigest()
+    header = (f"% Generated by scripts/latex/bibliography.py from references.bib; do not edit.\n"
+              f"% {len(selected)} entries, sha256 {digest}\n\n")
+    try:
+        with open(output) as file:
+            if file.readline() + file.readline() + file.readline() == header:
+                return False
+    except FileNotFoundError:
+        pass
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(header + body)
+    return True
+
+
+def chapter_keys(files, number) -> set:
+    """Return the keys cited by one chapter, from the preflight index."""
+    entry = files.get(f"chapters/{int(number):02d}.tex")
+    if entry is None:
+        raise ValueError(f"unknown chapter {number!r}; no src/chapters/{int(number):02d}.tex")
+    return {key for key, _ in entry['cites']}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chapter', type=int, metavar='N',
+                        help='only the entries chapter N cites')
+    parser.add_argument('-o', '--output', type=Path,
+                        help='output file (default: build/bib/main.bib or build/bib/chNN.bib)')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='print nothing unless the file is rewritten')
+    args = parser.parse_args(argv)
+
+    files, _ = preflight.update_index()
+    if args.chapter is None:
+        keys = preflight.cited_keys(files)
+        output = args.output or OUTPUT_DIR / "main.bib"
+    else:
+        try:
+            keys = chapter_keys(files, args.chapter)
+        except ValueError as exc:
+            parser.error(str(exc))
+        output = args.output or OUTPUT_DIR / f"ch{args.chapter:02d}.bib"
+
+    name = os.path.relpath(output, preflight.PROJECT_ROOT)
+    if prune(keys, output):
+        print(f"Generated: {name}")
+    elif not args.quiet:
+        print(f"Up to date: {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Compile a single chapter against the data of the last full build.
+
+The chapters are read with \\input rather than \\include, so \\includeonly
+cannot select one. Instead this script writes a wrapper, build/chapter/chNN.tex,
+made of main.tex's preamble verbatim (so the precompiled preamble format
+still applies) and a body that inputs only chapters/NN.tex, numbered and
+paginated as in the book.
+
+Before the single pdflatex pass, the wrapper's .aux, .bbl, .gls and .acr are
+copied from the last full build in build/tmp/, so \\ref, \\pageref, \\cite and
+glossary links resolve to the same numbers, pages and entries as in the
+book. The glossary builder and makeindex are not run, and a reference to
+something added since the last `make build` stays undefined until the next
+one. Biber runs only if the chapter cites a key the reused .bbl lacks, and
+then on build/bib/chNN.bib, the bibliography pruned to the chapter's own
+citations (see bibliography.py), followed by a second pdflatex pass.
+
+Only the figures named by the chapter's \\includegraphics lines are rendered,
+through scripts/figures/render.py and its cache.
+
+Examples:
+    chapter.py 14                    # build/out/chapter-14.pdf
+    chapter.py 14 --draft            # draft figures, as in make watch
+    chapter.py 14 --figures          # list the figure ids only
+"""
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import bibliography
+import preflight
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SOURCE_DIR = PROJECT_ROOT / "src"
+FULL_BUILD_DIR = PROJECT_ROOT / "build" / "tmp"
+CHAPTER_DIR = PROJECT_ROOT / "build" / "chapter"
+OUTPUT_DIR = PROJECT_ROOT / "build" / "out"
+FORMAT = PROJECT_ROOT / "build" / "fmt" / "preamble.fmt"
+PYTHON = sys.executable
+
+# Files of the full build that the chapter pass reads: labels, citations and glossaries
+REUSED_EXTENSIONS = ('aux', 'bbl', 'gls', 'acr')
+
+_COMMENT = re.compile(r'(?<!\\)%.*')
+_INCLUDEGRAPHICS = re.compile(r'\\includegraphics\s*(?:\[[^\]]*\])?\s*\{([^}]+)\}')
+_LABEL = re.compile(r'\\label\{([^}]+)\}')
+_BBL_ENTRY = re.compile(r'\\entry\{([^}]+)\}')
+
+
+def chapter_source(number) -> Path:
+    """Return src/chapters/NN.tex for a chapter number.
+
+    Raises:
+        ValueError: if there is no such chapter
+    """
+    path = SOURCE_DIR / "chapters" / f"{int(number):02d}.tex"
+    if not path.is_file():
+        chapters = sorted(p.stem for p in (SOURCE_DIR / "chapters").glob('[0-9]*.tex'))
+        raise ValueError(f"unknown chapter {number!r}; expected one of {', '.join(chapters)}")
+    return path
+
+
+def strip_comments(text) -> str:
+    """Remove LaTeX comments, keeping escaped percent signs."""
+    return _COMMENT.sub('', text)
+
+
+def figure_ids(text) -> list:
+    """Return the generated figures a chapter's \\includegraphics lines name, in order.
+
+    Example:
+        \\includegraphics[width=0.8\\textwidth]{generated/ch14-doppler-shift}
+        gives 'ch14-doppler-shift'. Photographs and other static images are ignored.
+    """
+    ids = []
+    for name in _INCLUDEGRAPHICS.findall(strip_comments(text)):
+        directory, _, stem = name.strip().rpartition('/')
+        figure_id = os.path.splitext(stem)[0]
+        if directory.endswith('generated') and figure_id not in ids:
+            ids.append(figure_id)
+    return ids
+
+
+def book_position(text, aux_text):
+    """Return the chapter's number and first page in the full build, if recorded.
+
+    The chapter's first \\label is looked up among the \\newlabel entries of
+    the book's .aux file.
+
+    Returns:
+        tuple of (chapter number, page), or None
+    """
+    labels = _LABEL.findall(strip_comments(text))
+    if not labels:
+        return None
+    entry = re.search(r'\\newlabel\{' + re.escape(labels[0]) + r'\}\{\{(\d+)\}\{(\d+)\}', aux_text)
+    return (int(entry.group(1)), int(entry.group(2))) if entry else None
+
+
+def wrapper(number, position=None) -> str:
+    """Return the text of the wrapper for a chapter: main.tex's preamble and just that chapter.
+
+    Args:
+        number: chapter number
+        position: (chapter number, first page) in the book, from book_position();
+            without it the chapter is numbered from its file name and starts on page 1
+    """
+    main = (SOURCE_DIR / "main.tex").read_text()
+    preamble, found, _ = main.partition('\\begin{document}')
+    if not found:
+        raise ValueError("src/main.tex has no \\begin{document}")
+    chapter, page = position or (int(number), 1)
+    body = [
+        "\\begin{document}",
+        "\\mainmatter",
+        f"\\setcounter{{chapter}}{{{chapter - 1}}}",
+        f"\\setcounter{{page}}{{{page}}}",
+        f"\\input{{chapters/{int(number):02d}}}",
+        "\\end{document}",
+    ]
+    header = f"% Generated by scripts/latex/chapter.py for chapter {int(number)}; do not edit.\n"
+    return header + preamble + "\n".join(body) + "\n"
+
+
+def format_is_current() -> bool:
+    """Whether the precompiled preamble is newer than what it was dumped from, as in latexmkrc."""
+    if not FORMAT.exists():
+        return False
+    built = FORMAT.stat().st_mtime
+    return all((SOURCE_DIR / name).stat().st_mtime <= built
+               for name in ('main.tex', 'preamble.tex', 'metadata.tex'))
+
+
+def reuse_full_build(jobname, extensions=REUSED_EXTENSIONS) -> list:
+    """Copy the last full build's auxiliary files under the chapter's job name.
+
+    Returns:
+        the extensions copied
+    """
+    copied = []
+    for extension in extensions:
+        source = FULL_BUILD_DIR / f"main.{extension}"
+        if source.exists():
+            shutil.copyfile(source, CHAPTER_DIR / f"{jobname}.{extension}")
+            copied.append(extension)
+        else:
+            (CHAPTER_DIR / f"{jobname}.{extension}").unlink(missing_ok=True)
+    return copied
+
+
+def render_figures(ids, draft=False) -> int:
+    """Render the given figures if they are stale; returns render.py's exit status."""
+    if not ids:
+        return 0
+    command = [PYTHON, str(PROJECT_ROOT / "scripts" / "figures" / "render.py")]
+    for figure_id in ids:
+        command += ['--only', figure_id]
+    if draft:
+        command.append('--draft')
+    return subprocess.call(command, cwd=PROJECT_ROOT)
+
+
+def bbl_keys(path) -> set:
+    """Return the keys of the entries in a biber .bbl file, or none if it is missing."""
+    try:
+        return set(_BBL_ENTRY.findall(path.read_text(errors='replace')))
+    except FileNotFoundError:
+        return set()
+
+
+def run_biber(jobname) -> int:
+    """Run biber on the wrapper's control file from src/; returns biber's exit status."""
+    command = ['biber', '--quiet', f"--output-directory={os.path.relpath(CHAPTER_DIR, SOURCE_DIR)}",
+               jobname]
+    return subprocess.call(command, cwd=SOURCE_DIR, stdout=subprocess.DEVNULL)
+
+
+def compile_wrapper(jobname, bib, draft=False) -> int:
+    """Run one pdflatex pass over the wrapper from src/; returns pdflatex's exit status.
+
+    Args:
+        jobname: the wrapper's job name, e.g. 'ch14'
+        bib: the pruned bibliography main.tex should read
+        draft: use the draft figures
+    """
+    environment = dict(os.environ)
+    command = ['pdflatex', '-interaction=nonstopmode', '-file-line-error',
+               f"-jobname={jobname}", f"-output-directory={os.path.relpath(CHAPTER_DIR, SOURCE_DIR)}"]
+    if format_is_current():
+        command.insert(1, '-fmt=preamble')
+        environment['TEXFORMATS'] = f"{FORMAT.parent}:{environment.get('TEXFORMATS', '')}"
+    source = os.path.relpath(CHAPTER_DIR / f"{jobname}.tex", SOURCE_DIR)
+    pretex = f"\\def\\bibliographyfile{{{os.path.relpath(bib, SOURCE_DIR)}}}"
+    if draft:
+        pretex += "\\def\\figuredraft{}"
+    command.append(f"{pretex}\\input{{{source}}}")
+    return subprocess.call(command, cwd=SOURCE_DIR, env=environment, stdout=subprocess.DEVNULL)
+
+
+def undefined(log_text) -> dict:
+    """Count the undefined references and citations reported in a pdflatex log."""
+    return {kind: len(re.findall(rf"LaTeX Warning: {kind} .* undefined", log_text))
+            for kind in ('Reference', 'Citation')}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('chapter', type=int, help='chapter number, e.g. 14 for src/chapters/14.tex')
+    parser.add_argument('--draft', action='store_true',
+                        help='render and use the draft figures (low DPI, mathtext)')
+    parser.add_argument('--figures', action='store_true',
+                        help="list the figure ids the chapter includes and exit")
+    args = parser.parse_args(argv)
+
+    try:
+        source = chapter_source(args.chapter)
+    except ValueError as exc:
+        parser.error(str(exc))
+    text = source.read_text()
+    ids = figure_ids(text)
+    if args.figures:
+        for figure_id in ids:
+            print(figure_id)
+        return 0
+
+    status = render_figures(ids, draft=args.draft)
+    if status:
+        return status
+
+    jobname = f"ch{args.chapter:02d}"
+    CHAPTER_DIR.mkdir(parents=True, exist_ok=True)
+    copied = reuse_full_build(jobname)
+    if 'aux' in copied:
+        position = book_position(text, (CHAPTER_DIR / f"{jobname}.aux").read_text(errors='replace'))
+    else:
+        position = None
+        print("No full build in build/tmp; run `make build` first so references and "
+              "citations resolve", file=sys.stderr)
+    (CHAPTER_DIR / f"{jobname}.tex").write_text(wrapper(args.chapter, position))
+
+    files, _ = preflight.update_index()
+    keys = bibliography.chapter_keys(files, args.chapter)
+    bib = bibliography.OUTPUT_DIR / f"{jobname}.bib"
+    bibliography.prune(keys, bib)
+    uncited = keys - bbl_keys(CHAPTER_DIR / f"{jobname}.bbl") - {'*'}
+
+    if shutil.which('pdflatex') is None:
+        print("pdflatex not found; install TeX Live (see docs/build.md)", file=sys.stderr)
+        return 1
+    pdf = CHAPTER_DIR / f"{jobname}.pdf"
+    pdf.unlink(missing_ok=True)
+    compile_wrapper(jobname, bib, draft=args.draft)
+    if uncited and pdf.exists() and shutil.which('biber'):
+        print(f"Running biber for {len(uncited)} citation(s) not in the last full build")
+        run_biber(jobname)
+        if 'aux' in copied:
+            # The first pass rewrote the .aux with this chapter's labels only
+            reuse_full_build(jobname, extensions=('aux',))
+        compile_wrapper(jobname, bib, draft=args.draft)
+    if not pdf.exists():
+        print(f"✗ Chapter {args.chapter} failed; see {os.path.relpath(pdf.with_suffix('.log'), PROJECT_ROOT)}",
+              file=sys.stderr)
+        return 1
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output = OUTPUT_DIR / f"chapter-{args.chapter:02d}.pdf"
+    shutil.copyfile(pdf, output)
+    print(f"✓ Chapter {args.chapter} built: {os.path.relpath(output, PROJECT_ROOT)}")
+    counts = undefined(pdf.with_suffix('.log').read_text(errors='replace'))
+    for kind, count in counts.items():
+        if count:
+            print(f"⚠ {count} undefined {kind.lower()}(s); run `make build` to refresh build/tmp")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
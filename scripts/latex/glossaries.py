@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""Build the glossaries' .gls and .acr files in-process, replacing makeglossaries.
+
+The glossaries package writes one usage record per \\gls (and one per entry
+for \\glsaddall) to a file per glossary, .glo for the main glossary and .acn
+for acronyms, and a makeindex style file, .ist, describing the output. The
+glossaries of a document, their file extensions and the style file are
+listed in its .aux file. makeglossaries runs makeindex (a Perl wrapper
+around a C program) once per glossary to sort the records and write the
+.gls and .acr files that \\printglossary reads.
+
+This script does the same in one Python process. It emulates the part of
+makeindex that glossaries uses: records are parsed with the style's
+actual, encap, level and quote characters, merged per entry, sorted by
+their sort key into symbol, number and letter groups, and written with the
+style's preamble, headings, item separators and page delimiters; as in
+makeindex, explicit ranges are kept and runs of three or more consecutive
+pages with the same format become ranges, while two consecutive pages are
+listed separately. The output is equivalent to makeindex's, but not
+byte-identical, since makeindex also wraps long lines.
+
+The labels in the records are checked against the entries defined in
+src/glossary/terms.tex and acronyms.tex. Each glossary's log (.glg, .alg)
+records a digest of its records and style, and a glossary whose digest is
+unchanged is skipped. An empty glossary gets no output file, as with
+makeglossaries, but is not an error.
+
+Examples:
+    glossaries.py -d ../build/tmp main     # as latexmkrc runs it, from src/
+    glossaries.py -d build/tmp --force main
+"""
+
+import argparse
+import hashlib
+import re
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFINITIONS = [PROJECT_ROOT / "src" / "glossary" / "terms.tex",
+               PROJECT_ROOT / "src" / "glossary" / "acronyms.tex"]
+
+# Bump to rebuild every glossary when the output of this script changes
+BUILDER_VERSION = 2
+
+# makeindex's defaults, for any setting the style file leaves out
+MAKEINDEX_DEFAULTS = {
+    'keyword': '\\indexentry', 'arg_open': '{', 'arg_close': '}',
+    'actual': '@', 'encap': '|', 'level': '!', 'quote': '"', 'escape': '\\',
+    'range_open': '(', 'range_close': ')', 'page_compositor': '-',
+    'preamble': '\\begin{theindex}\n', 'postamble': '\n\n\\end{theindex}\n',
+    'group_skip': '\n\n  \\indexspace\n', 'headings_flag': 0,
+    'heading_prefix': '', 'heading_suffix': '',
+    'symhead_positive': 'Symbols', 'symhead_negative': 'symbols',
+    'numhead_positive': 'Numbers', 'numhead_negative': 'numbers',
+    'item_0': '\n  \\item ', 'item_1': '\n    \\subitem ', 'item_2': '\n      \\subsubitem ',
+    'item_01': '\n    \\subitem ', 'item_x1': '\n    \\subitem ',
+    'item_12': '\n      \\subsubitem ', 'item_x2': '\n      \\subsubitem ',
+    'delim_0': ', ', 'delim_1': ', ', 'delim_2': ', ', 'delim_n': ', ', 'delim_r': '--',
+    'delim_t': '', 'encap_prefix': '\\', 'encap_infix': '{', 'encap_suffix': '}',
+}
+
+_STYLE_LINE = re.compile(r'^\s*(\w+)\s+("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)\'|-?\d+)', re.MULTILINE)
+_ESCAPE = re.compile(r'\\(.)', re.DOTALL)
+_NEW_GLOSSARY = re.compile(r'\\@newglossary\{([^}]*)\}\{([^}]*)\}\{([^}]*)\}\{([^}]*)\}')
+_IST_FILENAME = re.compile(r'\\@istfilename\{([^}]*)\}')
+_DEFINITION = re.compile(r'\\(?:newglossaryentry|newacronym(?:\[[^\]]*\])?)\s*\{([^}]+)\}')
+_GLOSSENTRY = re.compile(r'\\glossentry\{([^}]+)\}')
+_ROMAN = re.compile(r'^(?=[mdclxvi])m*(c[md]|d?c{0,3})(x[cl]|l?x{0,3})(i[xv]|v?i{0,3})$')
+_ROMAN_VALUES = {'i': 1, 'v': 5, 'x': 10, 'l': 50, 'c': 100, 'd': 500, 'm': 1000}
+
+
+class Glossary(NamedTuple):
+    """One glossary of a document, from its \\@newglossary line in the .aux file."""
+
+    name: str
+    log: str
+    output: str
+    input: str
+
+
+class Record(NamedTuple):
+    """One usage record: the entry's (sort key, text) per level, its page format and page."""
+
+    levels: tuple
+    encap: str
+    page: str
+
+
+def read_style(text) -> dict:
+    """Parse a makeindex style (.ist) file, filling in makeindex's defaults."""
+    style = dict(MAKEINDEX_DEFAULTS)
+    for key, value in _STYLE_LINE.findall(text):
+        if value[0] in '"\'':
+            escapes = {'n': '\n', 't': '\t'}
+            value = _ESCAPE.sub(lambda match: escapes.get(match.group(1), match.group(1)), value[1:-1])
+        else:
+            value = int(value)
+        style[key] = value
+    return style
+
+
+def read_aux(text):
+    """Return the glossaries and the style file name listed in a document's .aux file."""
+    glossaries = [Glossary(*match) for match in _NEW_GLOSSARY.findall(text)]
+    style = _IST_FILENAME.search(text)
+    return glossaries, style.group(1) if style else None
+
+
+def _argument(text, start, style):
+    """Return the balanced argument of a record starting at text[start], and the index after it."""
+    if not text.startswith(style['arg_open'], start):
+        raise ValueError(f"expected {style['arg_open']!r} at offset {start}")
+    depth, index = 0, start
+    while index < len(text):
+        char = text[index]
+        if char in (style['quote'], style['escape']) and index + 1 < len(text):
+            index += 2
+            continue
+        if char == style['arg_open']:
+            depth += 1
+        elif char == style['arg_close']:
+            depth -= 1
+            if not depth:
+                return text[start + 1:index], index + 1
+        index += 1
+    raise ValueError(f"unbalanced argument at offset {start}")
+
+
+def _split(key, style):
+    """Split a record's key at its unquoted level, actual and encap characters.
+
+    Returns:
+        tuple of (levels, encap): levels is a list of (sort, actual) pairs
+    """
+    levels, fields, current, field = [], {}, [], 'sort'
+    index = 0
+    while index < len(key):
+        char = key[index]
+        if char == style['quote'] and index + 1 < len(key):
+            current.append(key[index + 1])
+            index += 2
+            continue
+        if char == style['escape'] and index + 1 < len(key):
+            current.append(key[index:index + 2])
+            index += 2
+            continue
+        if field != 'encap' and char in (style['level'], style['actual'], style['encap']):
+            fields[field] = ''.join(current)
+            current = []
+            if char == style['level']:
+                levels.append((fields['sort'], fields.get('actual', fields['sort'])))
+                fields, field = {}, 'sort'
+            else:
+                field = 'actual' if char == style['actual'] else 'encap'
+        else:
+            current.append(char)
+        index += 1
+    fields[field] = ''.join(current)
+    levels.append((fields['sort'], fields.get('actual', fields['sort'])))
+    return levels, fields.get('encap', '')
+
+
+def parse_records(text, style) -> list:
+    """Parse the usage records of one glossary (.glo or .acn file).
+
+    Raises:
+        ValueError: if a record is malformed
+    """
+    records = []
+    keyword = style['keyword']
+    position = text.find(keyword)
+    while position >= 0:
+        key, end = _argument(text, position + len(keyword), style)
+        page, end = _argument(text, end, style)
+        levels, encap = _split(key, style)
+        records.append(Record(tuple(levels), encap, page))
+        position = text.find(keyword, end)
+    return records
+
+
+def _roman_value(text):
+    total = 0
+    for char, following in zip(text, text[1:] + ' '):
+        value = _ROMAN_VALUES[char]
+        total += -value if _ROMAN_VALUES.get(following, 0) > value else value
+    return total
+
+
+def page_order(page):
+    """Sort key of a page number, in makeindex's default order: roman, arabic, alphabetic."""
+    if page.isdigit():
+        return (1, int(page))
+    if _ROMAN.match(page):
+        return (0, _roman_value(page))
+    if _ROMAN.match(page.lower()):
+        return (3, _roman_value(page.lower()))
+    if len(page) == 1 and page.isalpha():
+        return (2, ord(page)) if page.islower() else (4, ord(page))
+    return (5, page)
+
+
+def _group(sort):
+    """Return the letter group of a sort key: 'symbols', 'numbers' or an upper-case letter."""
+    first = sort[:1]
+    if first.isalpha() and first.isascii():
+        return first.upper()
+    return 'numbers' if first.isdigit() else 'symbols'
+
+
+def _entry_order(levels):
+    group = _group(levels[0][0])
+    rank = {'symbols': 0, 'numbers': 1}.get(group, 2)
+    return (rank, group, tuple((sort.casefold(), sort, actual) for sort, actual in levels))
+
+
+def format_pages(records, style, level):
+    """Format an entry's pages: delim_N, then the pages joined by delim_n, then delim_t.
+
+    Each item is [encap, first page, last page, pages in the run]; an explicit
+    range has no count and is always written as a range, an implicit run only
+    once it covers three pages.
+    """
+    pages, ranges = [], {}
+    for record in sorted(records, key=lambda record: page_order(record.page)):
+        encap, page = record.encap, record.page
+        if encap.startswith(style['range_open']):
+            ranges[encap[1:]] = page
+            continue
+        if encap.startswith(style['range_close']):
+            encap = encap[1:]
+            start = ranges.pop(encap, page)
+            pages.append([encap, start, page, None])
+            continue
+        previous = pages[-1] if pages else None
+        if previous and previous[0] == encap:
+            last, this = page_order(previous[2]), page_order(page)
+            if last == this:
+                continue
+            if last[0] == this[0] and this[0] in (0, 1, 3) and this[1] == last[1] + 1:
+                previous[2] = page
+                if previous[3] is not None:
+                    previous[3] += 1
+                continue
+        pages.append([encap, page, page, 1])
+
+    def wrap(encap, page):
+        if not encap:
+            return page
+        return f"{style['encap_prefix']}{encap}{style['encap_infix']}{page}{style['encap_suffix']}"
+
+    parts = []
+    for encap, start, end, count in pages:
+        if start == end:
+            parts.append(wrap(encap, start))
+        elif count == 2:
+            parts += [wrap(encap, start), wrap(encap, end)]
+        else:
+            parts.append(wrap(encap, start) + style['delim_r'] + wrap(encap, end))
+    if not parts:
+        return ''
+    return style[f"delim_{level}"] + style['delim_n'].join(parts) + style['delim_t']
+
+
+def build(records, style) -> str:
+    """Sort and merge the usage records of one glossary into the text makeindex would write."""
+    entries = {}
+    for record in records:
+        entries.setdefault(record.levels, []).append(record)
+    # Parents of sub-entries appear even when they have no records of their own
+    for levels in list(entries):
+        for depth in range(1, len(levels)):
+            entries.setdefault(levels[:depth], [])
+
+    output = [style['preamble']]
+    group, previous = None, None
+    for levels in sorted(entries, key=_entry_order):
+        level = len(levels) - 1
+        if level == 0:
+            current = _group(levels[0][0])
+            if current != group:
+                if group is not None:
+                    output.append(style['group_skip'])
+                if style['headings_flag']:
+                    output.append(style['heading_prefix'] + _heading(current, style) + style['heading_suffix'])
+                group = current
+            item = style['item_0']
+        elif previous is not None and len(previous) - 1 >= level:
+            item = style[f"item_{level}"]
+        else:
+            item = style[f"item_{level - 1}{level}" if previous and entries[previous] else f"item_x{level}"]
+        output.append(item + levels[-1][1] + format_pages(entries[levels], style, level))
+        previous = levels
+    output.append(style['postamble'])
+    return ''.join(output)
+
+
+def _heading(group, style):
+    """Return the group heading for the style's headings_flag (positive: upper case)."""
+    sign = 'positive' if style['headings_flag'] > 0 else 'negative'
+    if group in ('symbols', 'numbers'):
+        return style[f"{group[:3]}head_{sign}"]
+    return group if sign == 'positive' else group.lower()
+
+
+def defined_labels() -> set:
+    """Return the labels of the entries defined in src/glossary/terms.tex and acronyms.tex."""
+    labels = set()
+    for path in DEFINITIONS:
+        text = re.sub(r'(?<!\\)%.*', '', path.read_text())
+        labels.update(_DEFINITION.findall(text))
+    return labels
+
+
+def _digest(records_text, style_text):
+    data = f"v{BUILDER_VERSION}\n{style_text}\n{records_text}".encode()
+    return hashlib.sha256(data).hexdigest()
+
+
+def make(base, directory, force=False, labels=None):
+    """Build every glossary of a document whose records or style changed.
+
+    Args:
+        base: the document's job name, e.g. 'main'
+        directory: directory holding its .aux, style and glossary files
+        force: rebuild glossaries whose digest is unchanged
+        labels: defined entry labels to check the records against (default:
+            those in src/glossary)
+
+    Returns:
+        list of (glossary, state) with state 'built', 'current' or 'empty'
+    """
+    directory = Path(directory)
+    glossaries, style_name = read_aux((directory / f"{base}.aux").read_text(errors='replace'))
+    style_text = (directory / style_name).read_text() if style_name else ''
+    style = read_style(style_text)
+    labels = defined_labels() if labels is None else labels
+
+    results = []
+    for glossary in glossaries:
+        source = directory / f"{base}.{glossary.input}"
+        output = directory / f"{base}.{glossary.output}"
+        log = directory / f"{base}.{glossary.log}"
+        records_text = source.read_text(errors='replace') if source.exists() else ''
+        digest = _digest(records_text, style_text)
+        try:
+            current = digest in log.read_text() and (output.exists() or not records_text.strip())
+        except FileNotFoundError:
+            current = False
+        if current and not force:
+            results.append((glossary, 'current'))
+            continue
+
+        records = parse_records(records_text, style)
+        undefined = sorted({label for record in records
+                            for label in _GLOSSENTRY.findall(record.levels[-1][1])} - labels)
+        for label in undefined:
+            print(f"warning: {source.name}: entry {label!r} is not defined in src/glossary",
+                  file=sys.stderr)
+        if records:
+            output.write_text(build(records, style))
+        else:
+            output.unlink(missing_ok=True)
+        log.write_text(f"Glossary '{glossary.name}' built by scripts/latex/glossaries.py\n"
+                       f"{len(records)} records, {len({r.levels for r in records})} entries\n"
+                       f"sha256 {digest}\n")
+        results.append((glossary, 'built' if records else 'empty'))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base', help="the document's job name, e.g. main")
+    parser.add_argument('-d', '--directory', type=Path, default=Path('.'),
+                        help='directory holding the .aux, .ist and glossary files')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='rebuild glossaries whose records are unchanged')
+    args = parser.parse_args(argv)
+
+    base = Path(args.base).name
+    if base.endswith(('.aux', '.glo', '.acn')):
+        base = base[:-4]
+    try:
+        results = make(base, args.directory, force=args.force)
+    except (FileNotFoundError, ValueError) as exc:
+        print(f"glossaries.py: {exc}", file=sys.stderr)
+        return 1
+    for glossary, state in results:
+        print(f"{glossary.name:10s} {base}.{glossary.output}  {state}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
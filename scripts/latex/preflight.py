@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Check cross-references and citations in src/ before any TeX runs.
+
+Every .tex file under src/ is scanned for \\label, for references (\\ref,
+\\cref, \\Cref, \\pageref, ...) and for biblatex citations (\\cite,
+\\textcite, \\parencite, ...), and references.bib for its entry keys. A
+reference to a label that no file defines, a citation of a key that is not
+in the bibliography, and a label defined twice are reported as file:line
+errors and fail the check; a bibliography key defined twice is a warning.
+
+The scan results are kept in a persistent index, build/preflight/index.json,
+with each file's size and modification time. Later runs re-read only the
+files whose size or time changed, so the check over the whole book takes a
+fraction of a second and `make build` can run it before figures, tables or
+pdflatex.
+
+Examples:
+    preflight.py                     # check, updating the index
+    preflight.py --warnings          # also list duplicate bibliography keys
+    preflight.py --rebuild           # rescan every file
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+SOURCE_DIR = PROJECT_ROOT / "src"
+BIBLIOGRAPHY = SOURCE_DIR / "bibliography" / "references.bib"
+INDEX_PATH = PROJECT_ROOT / "build" / "preflight" / "index.json"
+
+# Bump to rescan every file when the scanner or the index layout changes
+INDEX_VERSION = 1
+
+REFERENCE_COMMANDS = ('ref', 'pageref', 'cref', 'Cref', 'cpageref', 'Cpageref',
+                      'autoref', 'nameref', 'eqref', 'vref', 'labelcref')
+CITATION_COMMANDS = ('cite', 'Cite', 'textcite', 'Textcite', 'parencite', 'Parencite',
+                     'autocite', 'Autocite', 'footcite', 'footcitetext', 'smartcite',
+                     'Smartcite', 'supercite', 'fullcite', 'footfullcite', 'citeauthor',
+                     'Citeauthor', 'citetitle', 'citeyear', 'citedate', 'citeurl', 'nocite')
+
+_COMMENT = re.compile(r'(?<!\\)%.*')
+_LABEL = re.compile(r'\\label\{([^}]*)\}')
+_REFERENCE = re.compile(r'\\(?:' + '|'.join(REFERENCE_COMMANDS) + r')\*?\{([^}]*)\}')
+# A citation command, then up to two optional [pre]/[post] notes, then the keys
+_CITATION = re.compile(r'\\(?:' + '|'.join(CITATION_COMMANDS) + r')\*?'
+                       r'(?:\s*\[[^\]]*\]){0,2}\s*\{([^}]*)\}')
+_BIB_ENTRY = re.compile(r'^\s*@(\w+)\s*[{(]\s*([^,\s]+)\s*,', re.MULTILINE)
+_BIB_SPECIAL = {'string', 'comment', 'preamble'}
+
+
+def _names(argument):
+    """Split a comma-separated argument, skipping macro parameters such as #1."""
+    return [name.strip() for name in argument.split(',') if name.strip() and '#' not in name]
+
+
+def scan_tex(text) -> dict:
+    """Find the labels, references and citations in a .tex file.
+
+    Returns:
+        dict with 'labels', 'refs' and 'cites', each a list of [name, line]
+    """
+    found = {'labels': [], 'refs': [], 'cites': []}
+    for number, line in enumerate(text.splitlines(), start=1):
+        if '\\' not in line:
+            continue
+        line = _COMMENT.sub('', line)
+        for kind, pattern in (('labels', _LABEL), ('refs', _REFERENCE), ('cites', _CITATION)):
+            for argument in pattern.findall(line):
+                found[kind] += [[name, number] for name in _names(argument)]
+    return found
+
+
+def scan_bib(text) -> dict:
+    """Find the entry keys of a .bib file.
+
+    Returns:
+        dict with 'entries', a list of [key, line]
+    """
+    entries = []
+    for match in _BIB_ENTRY.finditer(text):
+        if match.group(1).lower() not in _BIB_SPECIAL:
+            entries.append([match.group(2), text.count('\n', 0, match.start(2)) + 1])
+    return {'entries': entries}
+
+
+def sources():
+    """Return every file the index covers: the .tex files under src/ and the bibliography."""
+    return sorted(SOURCE_DIR.rglob('*.tex')) + [BIBLIOGRAPHY]
+
+
+def load_index() -> dict:
+    """Load the persistent index, or an empty one if it is missing or from another version."""
+    try:
+        index = json.loads(INDEX_PATH.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return index.get('files', {}) if index.get('version') == INDEX_VERSION else {}
+
+
+def update_index(rebuild=False):
+    """Bring the index up to date, rescanning only files whose size or modification time changed.
+
+    Args:
+        rebuild: rescan every file
+
+    Returns:
+        tuple of (files, rescanned): the index, a dict of path relative to
+        src/ to its entry, and the number of files read
+    """
+    previous = {} if rebuild else load_index()
+    files, rescanned = {}, 0
+    for path in sources():
+        name = path.relative_to(SOURCE_DIR).as_posix()
+        stat = path.stat()
+        entry = previous.get(name)
+        if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            text = path.read_text(errors='replace')
+            entry = scan_bib(text) if path.suffix == '.bib' else scan_tex(text)
+            entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            rescanned += 1
+        files[name] = entry
+    if rescanned or files.keys() != previous.keys():
+        INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        temporary = INDEX_PATH.with_name(f"{INDEX_PATH.name}.{os.getpid()}.tmp")
+        temporary.write_text(json.dumps({'version': INDEX_VERSION, 'files': files}) + "\n")
+        os.replace(temporary, INDEX_PATH)
+    return files, rescanned
+
+
+def occurrences(files, kind) -> dict:
+    """Collect one kind of record ('labels', 'refs', 'cites' or 'entries') from the index.
+
+    Returns:
+        dict of name to a list of (path, line) where it occurs, paths relative to src/
+    """
+    found = {}
+    for path, entry in files.items():
+        for name, line in entry.get(kind, ()):
+            found.setdefault(name, []).append((path, line))
+    return found
+
+
+def cited_keys(files) -> set:
+    """Return the bibliography keys cited anywhere, or {'*'} if everything is \\nocite'd."""
+    keys = set(occurrences(files, 'cites'))
+    return {'*'} if '*' in keys else keys
+
+
+def check(files):
+    """Check the index for undefined and duplicate names.
+
+    References to undefined labels, citations of keys missing from the
+    bibliography and labels defined twice are errors. A key defined twice in
+    the bibliography is only a warning, since biber keeps the first entry.
+
+    Returns:
+        tuple of (errors, warnings), lists of "src/file:line: message" in file order
+    """
+    labels = occurrences(files, 'labels')
+    entries = occurrences(files, 'entries')
+    errors, warnings = [], []
+    for name, places in labels.items():
+        for path, line in places[1:]:
+            errors.append((path, line, f"label {name!r} already defined at "
+                                       f"src/{places[0][0]}:{places[0][1]}"))
+    for name, places in entries.items():
+        for path, line in places[1:]:
+            warnings.append((path, line, f"bibliography key {name!r} already defined on line "
+                                         f"{places[0][1]}; biber uses the first"))
+    for name, places in occurrences(files, 'refs').items():
+        if name not in labels:
+            errors += [(path, line, f"reference to undefined label {name!r}") for path, line in places]
+    for name, places in occurrences(files, 'cites').items():
+        if name != '*' and name not in entries:
+            errors += [(path, line, f"citation of {name!r}, which is not in "
+                                    f"{BIBLIOGRAPHY.relative_to(SOURCE_DIR).as_posix()}")
+                       for path, line in places]
+    return tuple([f"src/{path}:{line}: {message}" for path, line, message in sorted(found)]
+                 for found in (errors, warnings))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rebuild', action='store_true',
+                        help='ignore the index and rescan every file')
+    parser.add_argument('-W', '--warnings', action='store_true',
+                        help='also list warnings, such as duplicate bibliography keys')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    files, rescanned = update_index(rebuild=args.rebuild)
+    errors, warnings = check(files)
+    if args.warnings:
+        for warning in warnings:
+            print(f"warning: {warning}", file=sys.stderr)
+    for error in errors:
+        print(error, file=sys.stderr)
+    counts = {kind: sum(len(entry.get(kind, ())) for entry in files.values())
+              for kind in ('labels', 'refs', 'cites', 'entries')}
+    print(f"Preflight: {counts['labels']} labels, {counts['refs']} references, "
+          f"{counts['cites']} citations of {counts['entries']} entries in {len(files)} files "
+          f"({rescanned} rescanned) in {time.perf_counter() - start:.2f}s")
+    if warnings and not args.warnings:
+        print(f"⚠ {len(warnings)} warning(s); run with --warnings to list them")
+    if errors:
+        print(f"✗ {len(errors)} undefined or duplicate reference(s) and citation(s)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
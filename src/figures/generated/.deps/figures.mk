@@ -0,0 +1,63 @@
+# Generated by scripts/figures/render.py
+FIGURE_PNGS := \
+  src/figures/generated/ch01-latitude-geometry.png \
+  src/figures/generated/ch01-dead-reckoning-error.png \
+  src/figures/generated/ch02-catalog-precision.png \
+  src/figures/generated/ch02-mural-arc-principle.png \
+  src/figures/generated/ch03-celestial-coordinates.png \
+  src/figures/generated/ch03-atmospheric-refraction.png \
+  src/figures/generated/ch03-instrument-precision.png \
+  src/figures/generated/ch05-reduction-pipeline.png \
+  src/figures/generated/ch05-precession-drift.png \
+  src/figures/generated/ch05-error-averaging.png \
+  src/figures/generated/ch06-pendulum-physics.png \
+  src/figures/generated/ch06-temperature-error.png \
+  src/figures/generated/ch06-gravity-latitude.png \
+  src/figures/generated/ch06-ship-motion.png \
+  src/figures/generated/ch07-prize-thresholds.png \
+  src/figures/generated/ch07-board-timeline.png \
+  src/figures/generated/ch07-competing-methods.png \
+  src/figures/generated/ch08-lunar-parallax.png \
+  src/figures/generated/ch08-clearing-procedure.png \
+  src/figures/generated/ch08-lunar-distance-errors.png \
+  src/figures/generated/ch08-moon-motion-rate.png \
+  src/figures/generated/ch09-chronometer-evolution.png \
+  src/figures/generated/ch09-temperature-compensation.png \
+  src/figures/generated/ch09-trial-performance.png \
+  src/figures/generated/ch09-linked-balance.png \
+  src/figures/generated/ch09-error-sources.png \
+  src/figures/generated/ch10-navigator-procedure.png \
+  src/figures/generated/ch10-almanac-structure.png \
+  src/figures/generated/ch10-chronometer-vs-almanac.png \
+  src/figures/generated/ch10-computer-network.png \
+  src/figures/generated/ch11-transit-parallax.png \
+  src/figures/generated/ch11-halley-comet-orbit.png \
+  src/figures/generated/ch11-magnetic-variation.png \
+  src/figures/generated/ch11-halley-life-table.png \
+  src/figures/generated/ch12-aberration-geometry.png \
+  src/figures/generated/ch12-aberration-ellipse.png \
+  src/figures/generated/ch12-bradley-observations.png \
+  src/figures/generated/ch12-stellar-effects-comparison.png \
+  src/figures/generated/ch12-nutation-diagram.png \
+  src/figures/generated/ch12-zenith-sector.png \
+  src/figures/generated/ch12-speed-of-light.png \
+  src/figures/generated/ch13-transit-circle-schematic.png \
+  src/figures/generated/ch13-personal-equation.png \
+  src/figures/generated/ch13-precision-evolution.png \
+  src/figures/generated/ch13-prime-meridian-offset.png \
+  src/figures/generated/ch13-error-budget.png \
+  src/figures/generated/ch13-observation-reduction.png \
+  src/figures/generated/ch14-chromatic-aberration.png \
+  src/figures/generated/ch14-achromatic-doublet.png \
+  src/figures/generated/ch14-equatorial-mount.png \
+  src/figures/generated/ch14-spectroscope-prism.png \
+  src/figures/generated/ch14-emission-absorption.png \
+  src/figures/generated/ch14-doppler-shift.png \
+  src/figures/generated/ch14-diffraction-grating.png \
+  src/figures/generated/ch15-equation-of-time.png \
+  src/figures/generated/ch15-analemma.png \
+  src/figures/generated/ch15-eccentricity-effect.png \
+  src/figures/generated/ch15-obliquity-effect.png \
+  src/figures/generated/ch15-mean-vs-apparent.png \
+
+-include $(wildcard src/figures/generated/.deps/*.d)